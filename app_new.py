@@ -1,16 +1,42 @@
+import os
+import time
+import uuid
+
+# Імпорт Streamlit замірюється окремо: на холодному старті він дорожчий за сам розв'язок
+streamlit_import_started = time.perf_counter()
 import streamlit as st
+streamlit_import_seconds = time.perf_counter() - streamlit_import_started
 import pandas as pd
 import numpy as np
-import io
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.chart import BarChart, Reference
-from openpyxl.styles import numbers
-from pulp import *
 from PIL import Image # Імпортуємо бібліотеку Pillow для роботи із зображеннями
 
+from instrument_table import GROUP_COLUMN, MAX_INSTRUMENTS, clean_table, default_table, read_table, resize_table
+from jobs import JobCancelled, default_queue, job_result
+from mip import MIN_SPEND_COLUMN, PACKAGE_COLUMN, SETUP_COST_COLUMN, BuyingUnits, MipOptions
+from optimizer import STATUS_FEASIBLE, group_overlap_weights
+from report import XLSX_MIME, cached_report, report_cache
+from result_cache import cache_key, cached_frontier, cached_robustness, cached_solve, cached_solve_mip, default_cache
+from timing import StageTimer, stage
+
 st.set_page_config(page_title="Digital Split Optimizer", layout="wide")
 
+# Поетапні заміри часу поточного перезапуску скрипта (панель "Performance" внизу сторінки)
+perf_timer = StageTimer().start()
+perf_timer.record("streamlit_import", streamlit_import_seconds)
+rerun_time_placeholder = st.sidebar.empty()
+
+def show_performance():
+    perf_timer.stop()
+    perf_timer.log(instruments=len(df))
+    with st.expander("Performance"):
+        stages = pd.DataFrame(
+            [(name, seconds * 1000) for name, seconds in perf_timer.totals().items()],
+            columns=["Stage", "ms"],
+        )
+        st.dataframe(stages, hide_index=True)
+        st.caption(f"Загальний час перезапуску: {perf_timer.elapsed * 1000:.1f} мс")
+        st.json(perf_timer.to_dict(instruments=len(df)), expanded=False)
+
 # Завантажуємо та відображаємо логотип
 # Ви можете вибрати один із методів:
 
@@ -37,282 +63,352 @@ st.image(logo_url, width=200) # Підпис прибрано
 
 st.title("Digital Split Optimizer – Гібридний спліт")
 
+# ==== Статистика кешу результатів ====
+cache_stats_placeholder = st.sidebar.empty()
+
+def show_cache_stats():
+    stats = default_cache.stats()
+    cache_stats_placeholder.caption(
+        f"Кеш результатів: {stats['hits']} влучань / {stats['misses']} промахів "
+        f"(з диска: {stats['disk_hits']}), записів {stats['size']} з {stats['maxsize']}"
+    )
+
+show_cache_stats()
+
+# ==== Фонова черга розрахунків ====
+# Розв'язки виконуються у спільній черзі, тож сторінка не блокується, поки CBC рахує
+JOB_LABELS = {"solve": "Спліт", "frontier": "Крива бюджет–охоплення", "robustness": "Монте-Карло"}
+# Швидкі (нативні або з кешу) розв'язки встигають за цей час, і панель прогресу не з'являється
+JOB_WAIT_SECONDS = 0.5
+queue_stats_placeholder = st.sidebar.empty()
+# Черга спільна для всіх сесій: задачу, на яку підписано кілька сесій, скасовує лише остання з них
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+def show_queue_stats():
+    stats = default_queue.stats()
+    queue_stats_placeholder.caption(
+        f"Черга розрахунків: {stats['running']} виконується, {stats['queued']} очікує "
+        f"(воркерів: {stats['workers']})"
+    )
+
+def submit_request_jobs(request, overlap):
+    """Ставить розрахунки запиту в чергу; однакові запити різних сесій не дублюються, а підписуються на ту саму задачу."""
+    df, goal, value, audience = request["df"], request["goal"], request["budget_or_target"], request["audience"]
+    subscriber = st.session_state.session_id
+    if request["mip"] is not None:
+        solve_job = default_queue.submit(
+            cached_solve_mip, df, goal, value, audience, options=request["mip"], overlap=overlap, subscriber=subscriber,
+            label=JOB_LABELS["solve"], key=cache_key(df, goal, value, audience, overlap=overlap, kind='mip', options=request["mip"],
+                                                   units=BuyingUnits.from_frame(df).fingerprint()),
+        )
+    else:
+        solve_job = default_queue.submit(
+            cached_solve, df, goal, value, audience, overlap=overlap, subscriber=subscriber,
+            label=JOB_LABELS["solve"], key=cache_key(df, goal, value, audience, overlap=overlap, kind='solve'),
+        )
+    jobs = {"solve": solve_job}
+    if request["frontier"] is not None:
+        jobs["frontier"] = default_queue.submit(
+            cached_frontier, df, goal, *request["frontier"], audience, overlap=overlap, subscriber=subscriber,
+            label=JOB_LABELS["frontier"], key=cache_key(df, goal, *request["frontier"], audience, overlap=overlap, kind='frontier'),
+        )
+    if request["robustness"] is not None:
+        jobs["robustness"] = default_queue.submit(
+            cached_robustness, df, goal, value, audience, *request["robustness"], overlap=overlap, subscriber=subscriber,
+            label=JOB_LABELS["robustness"], key=cache_key(df, goal, value, audience, *request["robustness"], overlap=overlap, kind='robustness'),
+        )
+    return {name: job.id for name, job in jobs.items()}
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_ids):
+    """Оновлює прогрес щосекунди, не перезапускаючи решту сторінки; після завершення - повний rerun."""
+    jobs = {name: default_queue.poll(job_id) for name, job_id in job_ids.items()}
+    if all(job is None or job.done for job in jobs.values()):
+        st.rerun()
+    st.info("Розрахунок виконується у фоні - таблицю вище можна редагувати далі.")
+    for name, job in jobs.items():
+        st.progress(job.progress, text=f"{JOB_LABELS[name]}: {job.state} ({job.elapsed:.1f} с)")
+    if st.button("Скасувати розрахунок"):
+        for job_id in job_ids.values():
+            default_queue.cancel(job_id, subscriber=st.session_state.session_id)
+        st.rerun()
+
+show_queue_stats()
+
 # ==== Налаштування ====
 optimization_goal = st.radio(
     "Оберіть мету оптимізації:",
-    ('Максимізація охоплення', 'Мінімізація бюджету'),
+    ('Максимізація охоплення', 'Максимізація фактичного охоплення', 'Мінімізація бюджету'),
     horizontal=True
 )
 st.markdown("---")
 
-num_instruments = st.number_input("Кількість інструментів:", min_value=1, max_value=50, value=25, step=1)
+# ==== Імпорт таблиці інструментів ====
+if "editor_version" not in st.session_state:
+    st.session_state.editor_version = 0
+if "num_instruments" not in st.session_state:
+    st.session_state.num_instruments = 25
+
+uploaded = st.file_uploader("Імпорт інструментів (CSV або XLSX):", type=["csv", "xlsx"])
+if uploaded is not None and st.session_state.get("imported_file_id") != uploaded.file_id:
+    try:
+        imported_df = read_table(uploaded.getvalue(), uploaded.name)
+    except ValueError as e:
+        st.error(f"Не вдалося імпортувати файл: {e}")
+    else:
+        st.session_state.df = imported_df
+        st.session_state.num_instruments = len(imported_df)
+        # Новий ключ редактора скидає його незбережені правки під нову таблицю
+        st.session_state.editor_version += 1
+        st.success(f"Імпортовано інструментів: {len(imported_df)}")
+    st.session_state.imported_file_id = uploaded.file_id
+
+num_instruments = st.number_input("Кількість інструментів:", min_value=1, max_value=MAX_INSTRUMENTS, step=1, key="num_instruments")
 total_audience = st.number_input("Загальний розмір потенційної аудиторії:", value=50000, step=1000)
 
-if optimization_goal == 'Максимізація охоплення':
+if optimization_goal != 'Мінімізація бюджету':
     total_budget = st.number_input("Заданий бюджет ($):", value=100000, step=1000)
 else:
     reach_target_pct = st.number_input("Бажаний відсоток охоплення (%):", min_value=1, max_value=100, value=50, step=1)
+
+# ==== Крива бюджет–охоплення ====
+with st.expander("Крива бюджет–охоплення"):
+    frontier_enabled = st.checkbox("Побудувати криву оптимальних сплітів", value=False)
+    col1, col2, col3 = st.columns(3)
+    if optimization_goal != 'Мінімізація бюджету':
+        with col1:
+            frontier_start = st.number_input("Бюджет від ($):", min_value=0, value=10000, step=1000)
+        with col2:
+            frontier_stop = st.number_input("Бюджет до ($):", min_value=0, value=300000, step=1000)
+    else:
+        with col1:
+            frontier_start = st.number_input("Охоплення від (%):", min_value=1, max_value=100, value=5, step=1)
+        with col2:
+            frontier_stop = st.number_input("Охоплення до (%):", min_value=1, max_value=100, value=90, step=1)
+    with col3:
+        frontier_steps = st.number_input("Кількість точок:", min_value=2, max_value=1000, value=200, step=10)
     
+# ==== Стійкість до невизначеності CPM/Freq ====
+with st.expander("Стійкість до невизначеності CPM/Freq (Монте-Карло)"):
+    robustness_enabled = st.checkbox("Оцінити розкид результату", value=False)
+    col1, col2 = st.columns(2)
+    with col1:
+        robustness_samples = st.number_input("Кількість сценаріїв:", min_value=100, max_value=100000, value=10000, step=1000)
+    with col2:
+        robustness_spread_pct = st.number_input("Відхилення CPM та Freq (±%):", min_value=1, max_value=90, value=20, step=1)
+
+# ==== Перетин аудиторій ====
+with st.expander("Перетин аудиторій інструментів"):
+    overlap_enabled = st.checkbox("Враховувати дублювання аудиторій усередині груп (колонка Group)", value=False)
+    overlap_duplication = st.slider("Ступінь дублювання всередині групи:", min_value=0.0, max_value=1.0, value=0.3, step=0.05)
+    st.caption("0 - аудиторії незалежні, 1 - інструменти групи охоплюють тих самих людей. Інструменти без групи вважаються незалежними.")
+
+# ==== Цілочисельний режим (реальні одиниці закупівлі) ====
+with st.expander("Цілочисельний режим: пакети, мінімальні замовлення, запуск каналів"):
+    mip_enabled = st.checkbox("Враховувати колонки PackageSize, MinSpend та SetupCost", value=False)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        mip_time_limit = st.number_input("Ліміт часу розв'язувача (с):", min_value=1, max_value=600, value=10, step=1)
+    with col2:
+        mip_gap_pct = st.number_input("Допустимий розрив MIP (%):", min_value=0.0, max_value=50.0, value=1.0, step=0.5)
+    with col3:
+        mip_threads = st.number_input("Потоків CBC:", min_value=1, max_value=os.cpu_count() or 1, value=1, step=1)
+    st.caption(
+        "Бюджет інструмента кратний ціні пакета (PackageSize показів), не менший за MinSpend, "
+        "а SetupCost додається до бюджету, якщо інструмент активний. Для вибору каналів задайте MinShare = 0. "
+        "За лімітом часу повертається найкращий знайдений план. Лише для лінійних моделей; крива та Монте-Карло лишаються неперервними."
+    )
+
 # ==== Початкові дані ====
-# Ініціалізація або оновлення DataFrame на основі кількості інструментів
-if "df" not in st.session_state or len(st.session_state.df) != num_instruments:
-    st.session_state.df = pd.DataFrame({
-        "Instrument": [f"Instrument {i+1}" for i in range(num_instruments)],
-        "CPM": [50 + i*2 for i in range(num_instruments)],
-        "Freq": [1.0 + 0.05*i for i in range(num_instruments)],
-        "MinShare": [0.01 for _ in range(num_instruments)],
-        "MaxShare": [0.15 for i in range(num_instruments)]
-    })
-
-df = st.session_state.df.copy()
+# Таблиця інструментів зберігається в session_state як колонковий DataFrame
+if "df" not in st.session_state:
+    st.session_state.df = default_table(num_instruments)
+elif len(st.session_state.df) != num_instruments:
+    st.session_state.df = resize_table(st.session_state.df, num_instruments)
+    st.session_state.editor_version += 1
+
+df = st.session_state.df
 
 # ==== Форма редагування ====
 with st.form("instrument_form"):
     st.subheader("Редагування даних інструментів")
-    # Динамічне створення полів вводу для кожного інструмента
-    for i in range(len(df)):
-        st.markdown(f"**Інструмент {i+1}**")
-        col1, col2, col3, col4, col5 = st.columns(5)
-        with col1:
-            df.loc[i, "Instrument"] = st.text_input(f"Назва", value=df.loc[i, "Instrument"], key=f"name_{i}")
-        with col2:
-            df.loc[i, "CPM"] = st.number_input(f"CPM", value=float(df.loc[i, "CPM"]), step=1.0, key=f"cpm_{i}")
-        with col3:
-            df.loc[i, "Freq"] = st.number_input(f"Frequency", value=float(df.loc[i, "Freq"]), step=0.01, key=f"freq_{i}")
-        with col4:
-            df.loc[i, "MinShare"] = st.number_input(f"Min Share", value=float(df.loc[i, "MinShare"]), step=0.01, min_value=0.0, max_value=1.0, key=f"min_share_{i}")
-        with col5:
-            df.loc[i, "MaxShare"] = st.number_input(f"Max Share", value=float(df.loc[i, "MaxShare"]), step=0.01, min_value=0.0, max_value=1.0, key=f"max_share_{i}")
-        st.markdown("---") # Відокремлювач для кожного інструмента
+    # Одна таблиця-редактор замість окремих полів для кожного інструмента
+    edited_df = st.data_editor(
+        df,
+        key=f"instrument_editor_{st.session_state.editor_version}",
+        num_rows="fixed",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Instrument": st.column_config.TextColumn("Назва", required=True),
+            "CPM": st.column_config.NumberColumn("CPM", step=1.0, format="%.2f"),
+            "Freq": st.column_config.NumberColumn("Frequency", step=0.01, format="%.2f"),
+            "MinShare": st.column_config.NumberColumn("Min Share", min_value=0.0, max_value=1.0, step=0.01),
+            "MaxShare": st.column_config.NumberColumn("Max Share", min_value=0.0, max_value=1.0, step=0.01),
+            GROUP_COLUMN: st.column_config.TextColumn("Group"),
+            PACKAGE_COLUMN: st.column_config.NumberColumn("Package (покази)", min_value=0, step=1000),
+            MIN_SPEND_COLUMN: st.column_config.NumberColumn("Min Spend ($)", min_value=0.0, step=100.0),
+            SETUP_COST_COLUMN: st.column_config.NumberColumn("Setup Cost ($)", min_value=0.0, step=100.0),
+        },
+    )
     submitted = st.form_submit_button("Перерахувати спліт")
 
+page_build_seconds = time.perf_counter() - perf_timer.started
+perf_timer.record("page_build", page_build_seconds)
+rerun_time_placeholder.caption(f"Побудова сторінки з {len(df)} інструментами: {page_build_seconds * 1000:.0f} мс")
+
 if submitted:
+    df = clean_table(edited_df)
     st.session_state.df = df.copy() # Зберігаємо оновлений DataFrame в session_state
-    
-    # Розрахунок ефективності та CPR для всіх випадків
-    df["Efficiency"] = 1000 / (df["CPM"] * df["Freq"])
-    # CPR розраховується як CPM / 1000 * Freq. Уникаємо ділення на нуль, якщо Freq дорівнює 0.
-    df["CPR"] = np.where(df["Freq"] != 0, df["CPM"] / 1000 * df["Freq"], np.inf)
-    
-    # Функція розрахунку загального охоплення (нелінійна, використовується тільки для звітності)
-    def total_reach(budgets, df_current, total_audience_val):
-        # Перетворення бюджетів на масив numpy для векторних операцій
-        budgets_array = np.array(budgets)
-        
-        # Обчислення показників Impression. Уникаємо ділення на нуль, якщо CPM дорівнює 0.
-        impressions = np.where(df_current["CPM"].values != 0, budgets_array / df_current["CPM"].values * 1000, 0)
-        
-        # Обчислення Reach_i. Уникаємо ділення на нуль, якщо Freq дорівнює 0.
-        reach_i = np.where(
-            df_current["Freq"].values != 0, 
-            impressions / df_current["Freq"].values / total_audience_val, 
-            0
-        )
-        
-        # Обмеження reach_i значенням 1.0, щоб уникнути помилок в np.prod (1 - reach_i)
-        reach_i = np.clip(reach_i, 0.0, 1.0)
-        
-        # Розрахунок загального охоплення за формулою 1 - добуток (1 - reach_i)
-        return 1 - np.prod(1 - reach_i)
+    # Збережені правки вже в st.session_state.df, тому редактор стартує з чистого стану
+    st.session_state.editor_version += 1
+    # Зберігаємо параметри розрахунку, щоб результат (з кешу) лишався на сторінці між перезапусками скрипта
+    st.session_state.last_request = {
+        "df": df.copy(),
+        "goal": optimization_goal,
+        "budget_or_target": reach_target_pct if optimization_goal == 'Мінімізація бюджету' else total_budget,
+        "audience": total_audience,
+        "frontier": (frontier_start, frontier_stop, frontier_steps) if frontier_enabled else None,
+        "robustness": (robustness_samples, robustness_spread_pct / 100) if robustness_enabled else None,
+        "overlap": overlap_duplication if overlap_enabled else None,
+        "mip": MipOptions(time_limit=mip_time_limit, gap_rel=mip_gap_pct / 100, threads=mip_threads)
+               if mip_enabled and optimization_goal != 'Максимізація фактичного охоплення' else None,
+    }
+
+if "last_request" in st.session_state:
+    request = st.session_state.last_request
+    df = request["df"]
+    optimization_goal = request["goal"]
+    budget_or_target = total_budget = reach_target_pct = request["budget_or_target"]
+    total_audience = request["audience"]
+    frontier_enabled = request["frontier"] is not None
+    if frontier_enabled:
+        frontier_start, frontier_stop, frontier_steps = request["frontier"]
+    overlap = None
+    if request["overlap"] is not None and GROUP_COLUMN in df.columns:
+        overlap = group_overlap_weights(df[GROUP_COLUMN], request["overlap"])
 
+    # Задачі ставляться в чергу один раз на запит; витіснені з реєстру черги ставляться знову.
+    # Результати забираються один раз і далі беруться з запиту, тож час розв'язку
+    # потрапляє до панелі продуктивності лише на перезапуску, що його отримав
+    if "results" not in request:
+        if "jobs" not in request or any(default_queue.poll(job_id) is None for job_id in request["jobs"].values()):
+            request["jobs"] = submit_request_jobs(request, overlap)
+        jobs = {name: default_queue.poll(job_id) for name, job_id in request["jobs"].items()}
+        with stage("queue_wait"):
+            ready = default_queue.wait(jobs.values(), timeout=JOB_WAIT_SECONDS)
+        if not ready:
+            show_queue_stats()
+            show_job_progress(request["jobs"])
+            show_performance()
+            st.stop()
+
+        results = {}
+        for name, job in jobs.items():
+            try:
+                results[name] = job_result(job)
+            except JobCancelled:
+                st.warning(f"Розрахунок «{JOB_LABELS[name]}» скасовано. Натисніть «Перерахувати спліт», щоб запустити його знову.")
+                show_performance()
+                st.stop()
+            except Exception as e:
+                st.error(f"Помилка розрахунку «{JOB_LABELS[name]}»: {e}")
+                show_performance()
+                st.stop()
+            # Етапи воркера заміряє таймер задачі; переносимо їх до таймера сторінки разом із часом задачі
+            perf_timer.record(name, job.elapsed)
+            for stage_name, seconds in job.timer.totals().items():
+                perf_timer.record(f"{name}/{stage_name}", seconds)
+        request["results"] = results
+        # Результати тепер у сесії, а реєстр черги не має тримати їх ще раз
+        for job_id in request["jobs"].values():
+            default_queue.release(job_id, subscriber=st.session_state.session_id)
+    results = request["results"]
+    result = results["solve"]
+    
     # ==== Мінімізація бюджету (Рішення на основі лінійного програмування) ====
     if optimization_goal == 'Мінімізація бюджету':
         st.subheader(f"Результат: **Мінімізація бюджету**")
         
         if reach_target_pct <= 0:
             st.error("Цільовий відсоток охоплення має бути більше 0%. Будь ласка, введіть дійсне значення. 🎯")
+            st.stop()
+
+        if result.ok:
+            st.success(f"Оптимальне рішення знайдено! 🎉")
+            st.write(f"Мінімальний **Бюджет** для охоплення **{result.total_reach*100:.2f}%** аудиторії: **{result.total_budget:,.2f} $**")
+            st.dataframe(result.table)
         else:
-            reach_target_people = total_audience * (reach_target_pct / 100)
-
-            model = LpProblem("Minimize_Budget_for_Reach_Target", LpMinimize)
-
-            # Визначення змінних для бюджету кожного інструмента
-            budget_vars = LpVariable.dicts("Budget", df['Instrument'], lowBound=0)
-
-            # Цільова функція: мінімізація загального бюджету
-            model += lpSum([budget_vars[instrument] for instrument in df['Instrument']]), "Total Budget"
-
-            # Обмеження на загальне унікальне охоплення
-            unique_reach_per_instrument_terms = []
-            for _, row in df.iterrows():
-                # Додаємо термін тільки якщо Freq та CPM не нульові, інакше інструмент не дає охоплення
-                if row['Freq'] != 0 and row['CPM'] != 0:
-                    unique_reach_per_instrument_terms.append(budget_vars[row['Instrument']] / row['CPM'] * 1000 / row['Freq'])
-                else:
-                    # Якщо Freq або CPM дорівнює 0, цей інструмент не дає унікального охоплення в лінійному наближенні
-                    unique_reach_per_instrument_terms.append(0) 
-
-            model += lpSum(unique_reach_per_instrument_terms) >= reach_target_people, "Total Unique Reach Constraint"
-
-            # Обмеження на мінімальну/максимальну частку бюджету
-            # Для цього потрібно, щоб загальний бюджет був відомий або змінною.
-            # Якщо ми мінімізуємо бюджет, загальний бюджет є об'єктивною функцією.
-            # Тому ми посилаємось на загальну суму змінних бюджету.
-            total_budget_lp_var = lpSum([budget_vars[instrument] for instrument in df['Instrument']])
-            for _, row in df.iterrows():
-                # Обмеження MinShare: budget_i >= row['MinShare'] * total_budget_lp_var, f"Min Share {row['Instrument']}"
-                model += budget_vars[row['Instrument']] >= row['MinShare'] * total_budget_lp_var, f"Min Share {row['Instrument']}"
-                # Обмеження MaxShare: budget_i <= row['MaxShare'] * total_budget_lp_var, f"Max Share {row['Instrument']}"
-                model += budget_vars[row['Instrument']] <= row['MaxShare'] * total_budget_lp_var, f"Max Share {row['Instrument']}"
-
-            # Розв'язання моделі
-            status = model.solve()
-            
-            if status == LpStatusOptimal:
-                final_total_budget = value(model.objective)
-                df_result = df.copy()
-                
-                # Присвоюємо вирішені значення бюджету
-                df_result['Budget'] = [value(budget_vars[i]) for i in df_result['Instrument']]
-                
-                # Розрахунок відсотка частки бюджету
-                df_result["BudgetSharePct"] = df_result["Budget"] / final_total_budget if final_total_budget > 0 else 0
-                
-                # Розрахунок Impressions
-                df_result["Impressions"] = np.where(df_result["CPM"] != 0, df_result["Budget"] / df_result["CPM"] * 1000, 0)
-                
-                # Розрахунок Unique Reach (People)
-                df_result["Unique Reach (People)"] = np.where(df_result["Freq"] != 0, df_result["Impressions"] / df_result["Freq"], 0)
-                
-                # Розрахунок ReachPct
-                df_result["ReachPct"] = df_result["Unique Reach (People)"] / total_audience
-                df_result["ReachPct"] = df_result["ReachPct"].clip(upper=1.0) # Обмеження відсотка охоплення до 100%
-                
-                # Розрахунок загального охоплення за нелінійною формулою для звітності
-                total_reach_prob = total_reach(df_result["Budget"].values, df_result, total_audience)
-                
-                st.success(f"Оптимальне рішення знайдено! 🎉")
-                st.write(f"Мінімальний **Бюджет** для охоплення **{total_reach_prob*100:.2f}%** аудиторії: **{final_total_budget:,.2f} $**")
-                st.dataframe(df_result)
-            else:
-                st.warning(f"Не знайдено оптимального рішення. Статус: **{LpStatus[status]}**. Перевірте, чи можливо досягти цільового охоплення з заданими обмеженнями (цільовий відсоток охоплення, мінімальні/максимальні частки інструментів). 🧐")
+            st.warning(f"Не знайдено оптимального рішення. Статус: **{result.status}**. Перевірте, чи можливо досягти цільового охоплення з заданими обмеженнями (цільовий відсоток охоплення, мінімальні/максимальні частки інструментів). 🧐")
 
     # ==== Максимізація охоплення (Рішення на основі лінійного програмування) ====
     elif optimization_goal == 'Максимізація охоплення':
         st.subheader("Результат: **Максимізація охоплення** (Лінійне програмування)")
 
-        model = LpProblem("Maximize_Reach_LP_Approximation", LpMaximize)
-
-        # Визначення змінних для бюджету кожного інструмента
-        budget_vars = LpVariable.dicts("Budget", df['Instrument'], lowBound=0)
-
-        # Цільова функція: максимізація суми індивідуальних унікальних охоплень (лінійна апроксимація)
-        objective_terms = []
-        for _, row in df.iterrows():
-            # Додаємо термін тільки якщо Freq та CPM не нульові, інакше інструмент не дає охоплення
-            if row['Freq'] != 0 and row['CPM'] != 0:
-                objective_terms.append(budget_vars[row['Instrument']] / (row['CPM'] * row['Freq']) * 1000)
-            else:
-                objective_terms.append(0) # Інструмент з 0 Freq або CPM не сприяє охопленню в цьому наближенні
-        
-        model += lpSum(objective_terms), "Total Unique Reach (Sum of individual)"
+        if result.ok:
+            st.success(f"Оптимальне рішення знайдено! 🎉")
+            st.write(f"Максимізоване **Охоплення** (за лінійним наближенням): **{result.linear_reach:,.0f} людей**")
+            st.write(f"Фактичне **Охоплення** (за нелінійною формулою): **{result.total_reach*100:.2f}%** аудиторії")
+            st.write(f"Витрачений **Бюджет**: **{result.total_budget:,.2f} $** (з доступних {total_budget:,.2f} $)")
+            
+            st.dataframe(result.table)
+        else:
+            st.warning(f"Не знайдено оптимального рішення. Статус: **{result.status}**. Перевірте, чи можливо досягти максимального охоплення з заданими обмеженнями (загальний бюджет, мінімальні/максимальні частки інструментів). 🧐")
 
-        # Обмеження на загальний бюджет: сума бюджетів не повинна перевищувати заданий загальний бюджет
-        model += lpSum([budget_vars[instrument] for instrument in df['Instrument']]) <= total_budget, "Total Budget Constraint"
+    # ==== Максимізація фактичного охоплення (Нелінійна модель 1 - добуток (1 - reach_i)) ====
+    elif optimization_goal == 'Максимізація фактичного охоплення':
+        st.subheader("Результат: **Максимізація фактичного охоплення** (Нелінійна модель)")
 
-        # Обмеження на мінімальну/максимальну частку бюджету (відносно загального доступного бюджету)
-        for _, row in df.iterrows():
-            # Бюджет інструмента повинен бути не менше MinShare від загального бюджету
-            model += budget_vars[row['Instrument']] >= row['MinShare'] * total_budget, f"Min Share {row['Instrument']}"
-            # Бюджет інструмента повинен бути не більше MaxShare від загального бюджету
-            model += budget_vars[row['Instrument']] <= row['MaxShare'] * total_budget, f"Max Share {row['Instrument']}"
-            
-        # Розв'язання моделі
-        status = model.solve()
-        
-        if status == LpStatusOptimal:
-            # Об'єктивна функція повертає суму індивідуальних охоплень (кількість людей)
-            maximized_sum_of_unique_reach_people = value(model.objective) 
-            
-            df_result = df.copy()
-            
-            # Присвоюємо вирішені значення бюджету
-            df_result['Budget'] = [value(budget_vars[i]) for i in df_result['Instrument']]
-            
-            # Розрахунок фактично витраченого бюджету
-            total_budget_actual_spent = df_result['Budget'].sum()
-            
-            # Розрахунок відсотка частки бюджету
-            df_result["BudgetSharePct"] = df_result["Budget"] / total_budget_actual_spent if total_budget_actual_spent > 0 else 0
-            
-            # Розрахунок Impressions
-            df_result["Impressions"] = np.where(df_result["CPM"] != 0, df_result["Budget"] / df_result["CPM"] * 1000, 0)
-            
-            # Розрахунок Unique Reach (People)
-            df_result["Unique Reach (People)"] = np.where(df_result["Freq"] != 0, df_result["Impressions"] / df_result["Freq"], 0)
-            
-            # Розрахунок ReachPct
-            df_result["ReachPct"] = df_result["Unique Reach (People)"] / total_audience
-            df_result["ReachPct"] = df_result["ReachPct"].clip(upper=1.0)
-            
-            # Розрахунок загального охоплення за нелінійною формулою для звітності
-            total_reach_prob = total_reach(df_result["Budget"].values, df_result, total_audience)
-            
+        if result.ok:
             st.success(f"Оптимальне рішення знайдено! 🎉")
-            st.write(f"Максимізоване **Охоплення** (за лінійним наближенням): **{maximized_sum_of_unique_reach_people:,.0f} людей**")
-            st.write(f"Фактичне **Охоплення** (за нелінійною формулою): **{total_reach_prob*100:.2f}%** аудиторії")
-            st.write(f"Витрачений **Бюджет**: **{total_budget_actual_spent:,.2f} $** (з доступних {total_budget:,.2f} $)")
-            
-            st.dataframe(df_result)
+            st.write(f"Максимізоване **Охоплення** (за нелінійною формулою): **{result.total_reach*100:.2f}%** аудиторії")
+            st.write(f"Витрачений **Бюджет**: **{result.total_budget:,.2f} $** (з доступних {total_budget:,.2f} $)")
+
+            st.dataframe(result.table)
         else:
-            st.warning(f"Не знайдено оптимального рішення. Статус: **{LpStatus[status]}**. Перевірте, чи можливо досягти максимального охоплення з заданими обмеженнями (загальний бюджет, мінімальні/максимальні частки інструментів). 🧐")
+            st.warning(f"Не знайдено рішення. Статус: **{result.status}**. Перевірте, чи сумісні загальний бюджет та мінімальні/максимальні частки інструментів. 🧐")
+
+    if result.status == STATUS_FEASIBLE:
+        st.info("Ліміт часу розв'язувача вичерпано: показано найкращий знайдений цілочисельний план, його оптимальність не доведено.")
+
+    # ==== Крива бюджет–охоплення ====
+    curve = None
+    if frontier_enabled:
+        st.subheader("Крива бюджет–охоплення")
+        curve = results["frontier"]
+        chart_data = curve[curve["Status"] == "Optimal"].set_index("TotalBudget")[["TotalReachPct"]] * 100
+        st.line_chart(chart_data, x_label="Бюджет ($)", y_label="Фактичне охоплення (%)")
+        st.dataframe(curve)
+
+    # ==== Стійкість до невизначеності CPM/Freq ====
+    if request["robustness"] is not None:
+        robustness_samples, robustness_spread = request["robustness"]
+        st.subheader(f"Стійкість до невизначеності CPM/Freq (±{robustness_spread*100:.0f}%, {robustness_samples} сценаріїв)")
+        robustness = results["robustness"]
+        st.write(f"Допустимих сценаріїв: **{robustness.feasible.mean()*100:.1f}%**")
+        st.dataframe(robustness.summary)
+        st.dataframe(robustness.shares)
+
+    show_cache_stats()
+    show_queue_stats()
+
+    # Без розв'язку немає що вивантажувати
+    if not result.ok:
+        show_performance()
+        st.stop()
 
     # ==== Завантаження результатів у Excel ====
-    output = io.BytesIO()
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Гібридний спліт"
-    
-    excel_cols = ["Instrument", "CPM", "CPR", "Freq", "MinShare", "MaxShare", "Budget", "BudgetSharePct", "Impressions", "Unique Reach (People)", "ReachPct"]
+    # Звіт будується лише на запит і кешується за ключем результату
+    # Instruments не містить колонок одиниць закупівлі, тому їх відбиток додається до ключа окремо
+    report_key = cache_key(df, optimization_goal, budget_or_target, total_audience, overlap=overlap, kind='report',
+                           frontier=request["frontier"], mip=request["mip"], units=BuyingUnits.from_frame(df).fingerprint())
+    if report_key in report_cache or st.button("Підготувати Excel-звіт"):
+        st.download_button(
+            label="Завантажити результати (Excel)",
+            data=cached_report(report_key, result, curve),
+            file_name="Digital_Split_Hybrid.xlsx",
+            mime=XLSX_MIME
+        )
 
-    df_to_save = df_result[excel_cols].copy()
-    
-    final_total_budget = df_result["Budget"].sum()
-    final_total_reach_prob = total_reach(df_result["Budget"].values, df_result, total_audience)
-    final_total_reach_people_linear_sum = df_result["Unique Reach (People)"].sum() # Сума індивідуальних охоплень
-    
-    # Додаємо рядок "TOTAL" з сумарними значеннями
-    df_to_save.loc[len(df_to_save)] = [
-        "TOTAL", np.nan, np.nan, np.nan, 
-        df_result['MinShare'].sum(), # Сума MinShare
-        df_result['MaxShare'].sum(), # Сума MaxShare
-        final_total_budget, 
-        1.0, # 100% для загальної частки бюджету
-        df_result["Impressions"].sum(), 
-        final_total_reach_people_linear_sum, # Сума унікального охоплення (людей)
-        f"{final_total_reach_prob*100:.2f}%" # Загальне охоплення за нелінійною формулою
-    ]
-
-    # Запис DataFrame в Excel
-    for r in dataframe_to_rows(df_to_save, index=False, header=True):
-        ws.append(r)
-    
-    # Форматування колонки "BudgetSharePct" як відсотки
-    budget_share_pct_col = excel_cols.index("BudgetSharePct") + 1
-    for row in ws.iter_rows(min_row=2, max_row=1+len(df_result), min_col=budget_share_pct_col, max_col=budget_share_pct_col):
-        for cell in row:
-            cell.number_format = '0.00%'
-            
-    # Додавання гістограми
-    chart = BarChart()
-    chart.type = "col"
-    chart.title = "Бюджет по інструментам (%)"
-    chart.y_axis.title = "Budget Share (%)"
-    chart.x_axis.title = "Інструменти"
-    data = Reference(ws, min_col=budget_share_pct_col, min_row=1, max_row=1+len(df_result)) # Дані для графіка (частка бюджету)
-    categories = Reference(ws, min_col=1, min_row=2, max_row=1+len(df_result)) # Категорії (назви інструментів)
-    chart.add_data(data, titles_from_data=True)
-    chart.set_categories(categories)
-    ws.add_chart(chart, f"L{budget_share_pct_col}") # Розміщення графіка в аркуші Excel
-
-    # Збереження робочої книги у байтовий потік
-    wb.save(output)
-    output.seek(0)
-    
-    # Кнопка завантаження Excel файлу
-    st.download_button(
-        label="Завантажити результати (Excel)",
-        data=output,
-        file_name="Digital_Split_Hybrid.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+show_performance()
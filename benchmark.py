@@ -0,0 +1,151 @@
+"""Бенчмарк шляхів оптимізації та експорту без Streamlit.
+
+Запуск:
+    python benchmark.py                          # 5/50/500/5000 інструментів
+    python benchmark.py --sizes 50 500 --repeats 50 --json bench.json
+
+Для кожного розміру та мети замірюються p50/p99 затримки, пікова пам'ять
+Python (tracemalloc; пам'ять процесу CBC не враховується) і середній час
+етапів з timing.stage.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from instrument_table import clean_table
+from mip import MIN_SPEND_COLUMN, PACKAGE_COLUMN, SETUP_COST_COLUMN, MipOptions, solve_mip
+from optimizer import GOAL_MAX_REACH, GOAL_MAX_TOTAL_REACH, GOAL_MIN_BUDGET, Instruments, build_model, solve
+from report import build_report
+from timing import StageTimer
+
+DEFAULT_SIZES = (5, 50, 500, 5000)
+AUDIENCE = 5_000_000
+BUDGET = 1_000_000
+REACH_TARGET_PCT = 30
+
+
+def synthetic_table(n, seed=0):
+    """Випадкова, але завжди допустима таблиця з n інструментів."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Instrument": [f"Instrument {i+1}" for i in range(n)],
+        "CPM": rng.uniform(5, 120, n).round(2),
+        "Freq": rng.uniform(1, 4, n).round(2),
+        "MinShare": np.full(n, 0.1 / n),
+        "MaxShare": np.full(n, min(1.0, 3 / n)),
+    })
+
+
+def with_buying_units(df):
+    """Та сама таблиця з пакетами по 1000 показів і фіксованою вартістю запуску для MIP-режиму."""
+    df = df.copy()
+    df["MinShare"] = 0.0
+    df[PACKAGE_COLUMN] = 1000.0
+    df[MIN_SPEND_COLUMN] = 0.0
+    df[SETUP_COST_COLUMN] = 50.0
+    return df
+
+
+def measure(fn, repeats):
+    """Повертає (латентності в мс, середні етапи в мс, пікова пам'ять у КіБ)."""
+    fn()  # Прогрів: імпорти, кеші numpy/pandas
+    latencies = []
+    stage_totals = {}
+    for _ in range(repeats):
+        with StageTimer() as timer:
+            fn()
+        latencies.append(timer.elapsed * 1000)
+        for name, seconds in timer.totals().items():
+            stage_totals[name] = stage_totals.get(name, 0.0) + seconds * 1000 / repeats
+
+    # Пам'ять міряється окремим прогоном: tracemalloc сповільнює виконання
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latencies, stage_totals, peak / 1024
+
+
+def streamlit_import_ms():
+    """Час холодного імпорту Streamlit в окремому процесі (None, якщо не встановлено)."""
+    code = "import time; t = time.perf_counter(); import streamlit; print((time.perf_counter() - t) * 1000)"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None
+    return float(completed.stdout.strip())
+
+
+def cases(n, pulp_max_size, mip_options):
+    df = synthetic_table(n)
+    instruments = Instruments.from_frame(df)
+    mip_df = with_buying_units(df)
+
+    yield "instrument_table", None, None, lambda: Instruments.from_frame(clean_table(df))
+    for goal, value in ((GOAL_MAX_REACH, BUDGET), (GOAL_MIN_BUDGET, REACH_TARGET_PCT), (GOAL_MAX_TOTAL_REACH, BUDGET)):
+        yield "solve", goal, "native", lambda goal=goal, value=value: solve(instruments, goal, value, AUDIENCE)
+        if goal != GOAL_MAX_TOTAL_REACH and n <= pulp_max_size:
+            yield "build_model", goal, "pulp", lambda goal=goal, value=value: build_model(instruments, goal, value, AUDIENCE)
+            yield "solve", goal, "pulp", lambda goal=goal, value=value: solve(instruments, goal, value, AUDIENCE, backend='pulp')
+            yield "solve", goal, "mip", lambda goal=goal, value=value: solve_mip(mip_df, goal, value, AUDIENCE, options=mip_options)
+
+    result = solve(instruments, GOAL_MAX_REACH, BUDGET, AUDIENCE)
+    yield "excel_export", GOAL_MAX_REACH, None, lambda: build_report(result)
+
+
+def run(sizes, repeats, pulp_max_size, mip_options):
+    rows = []
+    for n in sizes:
+        for case, goal, backend, fn in cases(n, pulp_max_size, mip_options):
+            # CBC - окремий процес і на великих моделях повільний, тому для нього менше повторів
+            case_repeats = max(3, repeats // 5) if backend in ('pulp', 'mip') else repeats
+            latencies, stages, peak_kib = measure(fn, case_repeats)
+            rows.append({
+                "case": case,
+                "instruments": n,
+                "goal": goal,
+                "backend": backend,
+                "repeats": case_repeats,
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+                "peak_kib": round(peak_kib, 1),
+                "stages_ms": {name: round(ms, 3) for name, ms in stages.items()},
+            })
+            print(
+                f"{case:<17} n={n:<5} {str(goal or ''):<34} {str(backend or ''):<7} "
+                f"p50={rows[-1]['p50_ms']:>10.3f} ms  p99={rows[-1]['p99_ms']:>10.3f} ms  peak={peak_kib:>10.1f} KiB",
+                flush=True,
+            )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--pulp-max-size", type=int, default=5000,
+                        help="найбільша кількість інструментів, для якої запускається CBC")
+    parser.add_argument("--mip-time-limit", type=float, default=5.0,
+                        help="ліміт часу CBC у цілочисельному режимі, секунди")
+    parser.add_argument("--json", help="шлях для збереження результатів у JSON")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    import_ms = streamlit_import_ms()
+    print(f"streamlit import: {'не встановлено' if import_ms is None else f'{import_ms:.1f} ms'}", flush=True)
+    rows = run(args.sizes, args.repeats, args.pulp_max_size, MipOptions(time_limit=args.mip_time_limit, gap_rel=0.01))
+    print(f"Загальний час бенчмарку: {time.perf_counter() - started:.1f} s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"streamlit_import_ms": import_ms, "results": rows}, fh, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
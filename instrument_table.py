@@ -0,0 +1,167 @@
+"""Таблиця інструментів для редактора: значення за замовчуванням, зміна розміру,
+очищення після редагування та імпорт з CSV/XLSX.
+
+Усі операції колонкові (без циклів по рядках), тому працюють однаково швидко
+і для 5, і для кількох тисяч інструментів.
+"""
+
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from mip import MIN_SPEND_COLUMN, PACKAGE_COLUMN, SETUP_COST_COLUMN, UNIT_COLUMNS
+from optimizer import INPUT_COLUMNS
+
+MAX_INSTRUMENTS = 5000
+
+# Альтернативні назви колонок, що трапляються у вивантаженнях медіапланів
+COLUMN_ALIASES = {
+    "instrument": "Instrument",
+    "name": "Instrument",
+    "назва": "Instrument",
+    "інструмент": "Instrument",
+    "cpm": "CPM",
+    "freq": "Freq",
+    "frequency": "Freq",
+    "частота": "Freq",
+    "minshare": "MinShare",
+    "min share": "MinShare",
+    "min_share": "MinShare",
+    "maxshare": "MaxShare",
+    "max share": "MaxShare",
+    "max_share": "MaxShare",
+    "group": "Group",
+    "група": "Group",
+    "cluster": "Group",
+    "packagesize": PACKAGE_COLUMN,
+    "package size": PACKAGE_COLUMN,
+    "package": PACKAGE_COLUMN,
+    "пакет": PACKAGE_COLUMN,
+    "minspend": MIN_SPEND_COLUMN,
+    "min spend": MIN_SPEND_COLUMN,
+    "min_spend": MIN_SPEND_COLUMN,
+    "мінімальне замовлення": MIN_SPEND_COLUMN,
+    "setupcost": SETUP_COST_COLUMN,
+    "setup cost": SETUP_COST_COLUMN,
+    "setup_cost": SETUP_COST_COLUMN,
+    "setup": SETUP_COST_COLUMN,
+}
+
+# Необов'язкова колонка кластера для моделі перетину аудиторій
+GROUP_COLUMN = "Group"
+
+DEFAULT_MIN_SHARE = 0.01
+DEFAULT_MAX_SHARE = 0.15
+
+
+def default_shares(n):
+    """MinShare/MaxShare за замовчуванням для таблиці з n інструментів.
+
+    Сталі частки роблять великі таблиці (сума MinShare > 1) і малі (сума
+    MaxShare < 1) недопустимими, тож межі підлаштовуються під розмір:
+    сума MinShare не перевищує половини бюджету, сума MaxShare - не менше двох.
+    """
+    n = max(int(n), 1)
+    return min(DEFAULT_MIN_SHARE, 0.5 / n), min(max(DEFAULT_MAX_SHARE, 2 / n), 1.0)
+
+
+def default_table(n, start=0):
+    """Демонстраційні інструменти з номерами start+1..start+n.
+
+    Частки за замовчуванням розраховані на таблицю з start+n рядків.
+    """
+    i = np.arange(start, start + n)
+    min_share, max_share = default_shares(start + n)
+    return pd.DataFrame({
+        "Instrument": [f"Instrument {k+1}" for k in i],
+        "CPM": (50 + i*2).astype(float),
+        "Freq": 1.0 + 0.05*i,
+        "MinShare": np.full(n, min_share),
+        "MaxShare": np.full(n, max_share),
+        GROUP_COLUMN: pd.Series([None] * n, dtype=object),
+        # Одиниці закупівлі для цілочисельного режиму; 0 - без обмежень
+        PACKAGE_COLUMN: np.zeros(n),
+        MIN_SPEND_COLUMN: np.zeros(n),
+        SETUP_COST_COLUMN: np.zeros(n),
+    })
+
+
+def resize_table(df, n):
+    """Обрізає таблицю до n рядків або дописує інструменти за замовчуванням."""
+    if len(df) >= n:
+        return df.iloc[:n].reset_index(drop=True)
+    return pd.concat([df, default_table(n - len(df), start=len(df))], ignore_index=True)
+
+
+def _to_number(column, default):
+    # Десяткова кома ("50,5") типова для українських вивантажень
+    if not pd.api.types.is_numeric_dtype(column):
+        column = column.astype(str).str.replace(",", ".", regex=False)
+    return pd.to_numeric(column, errors="coerce").fillna(default)
+
+
+def clean_table(df):
+    """Приводить таблицю до колонок INPUT_COLUMNS (і Group та UNIT_COLUMNS, якщо є) з числовими типами.
+
+    Порожні клітинки (наприклад, очищені в редакторі) заповнюються
+    значеннями за замовчуванням (частки - з default_shares).
+    """
+    df = df.reset_index(drop=True)
+    min_share, max_share = default_shares(len(df))
+    missing_names = df["Instrument"].isna() | (df["Instrument"].astype(str).str.strip() == "")
+    names = df["Instrument"].astype(str).where(~missing_names, pd.Series([f"Instrument {k+1}" for k in range(len(df))]))
+    cleaned = pd.DataFrame({
+        "Instrument": names,
+        "CPM": _to_number(df["CPM"], 0.0),
+        "Freq": _to_number(df["Freq"], 0.0),
+        "MinShare": _to_number(df["MinShare"], min_share),
+        "MaxShare": _to_number(df["MaxShare"], max_share),
+    })
+    if GROUP_COLUMN in df.columns:
+        group = df[GROUP_COLUMN].astype(object)
+        cleaned[GROUP_COLUMN] = group.where(group.notna() & (group.astype(str).str.strip() != ""), None)
+    for col in UNIT_COLUMNS:
+        if col in df.columns:
+            cleaned[col] = _to_number(df[col], 0.0).clip(lower=0.0)
+    return cleaned
+
+
+def read_table(data, filename):
+    """Читає таблицю інструментів з CSV або XLSX (bytes або файловий об'єкт).
+
+    Назви колонок зіставляються без урахування регістру (див. COLUMN_ALIASES);
+    відсутні MinShare/MaxShare отримують значення за замовчуванням.
+    """
+    if isinstance(data, bytes):
+        data = io.BytesIO(data)
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        df = pd.read_excel(data)
+    elif extension in (".csv", ".txt"):
+        # sep=None визначає роздільник (кома чи крапка з комою) автоматично
+        try:
+            df = pd.read_csv(data, sep=None, engine="python")
+        except csv.Error as e:
+            # Порожній файл або файл без роздільників
+            raise ValueError(f"Не вдалося розібрати CSV: {e}") from e
+    else:
+        raise ValueError(f"Непідтримуваний формат файлу: {filename}")
+
+    df = df.rename(columns=lambda col: COLUMN_ALIASES.get(str(col).strip().lower(), str(col).strip()))
+    missing = [col for col in ("Instrument", "CPM", "Freq") if col not in df.columns]
+    if missing:
+        raise ValueError(f"У файлі бракує колонок: {', '.join(missing)}")
+    if len(df) == 0:
+        raise ValueError("У файлі немає жодного інструмента")
+    min_share, max_share = default_shares(len(df))
+    if "MinShare" not in df.columns:
+        df["MinShare"] = min_share
+    if "MaxShare" not in df.columns:
+        df["MaxShare"] = max_share
+    if len(df) > MAX_INSTRUMENTS:
+        raise ValueError(f"Забагато інструментів: {len(df)} (максимум {MAX_INSTRUMENTS})")
+    optional = [col for col in [GROUP_COLUMN] + UNIT_COLUMNS if col in df.columns]
+    return clean_table(df[INPUT_COLUMNS + optional])
@@ -0,0 +1,224 @@
+"""Фонова черга розрахунків, спільна для всіх сесій Streamlit у межах процесу.
+
+Розв'язки виконуються в пулі потоків, тож скрипт сторінки лише ставить задачу
+в чергу й опитує її стан, а не чекає на CBC. Потоків достатньо: CBC працює в
+окремому процесі, а numpy звільняє GIL на важких операціях, тому пропускна
+здатність росте з кількістю воркерів.
+
+Довгі розрахунки повідомляють прогрес через ``timing.report_progress(частка)``;
+задача черги обробляє його і там само перевіряє скасування, тож скасована задача зупиняється на
+найближчій точці кривої або пакеті сценаріїв. Одиночний виклик CBC
+перервати не можна - його тривалість обмежує ``time_limit`` розв'язувача.
+
+Контекст потоку-воркера не успадковує таймер сторінки, тому кожна задача
+виконується під власним ``Job.timer``; його етапи додаються до таймера
+сторінки, коли результат забирають.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+
+from timing import StageTimer, progress_callback
+
+WORKERS_ENV = "SPLIT_OPTIMIZER_WORKERS"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    """Задачу скасовано під час виконання."""
+
+
+class Job:
+    """Задача черги; стан читається без блокувань через ``state`` і ``progress``."""
+
+    def __init__(self, label, key=None):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.key = key
+        self.future = None
+        self.progress = 0.0
+        self.cancel_requested = False
+        # Хто чекає на результат (наприклад, id сесій Streamlit); див. SolveQueue.cancel
+        self.subscribers = set()
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.timer = StageTimer()
+
+    @property
+    def state(self):
+        if self.future.cancelled() or (self.cancel_requested and self.future.done()):
+            return CANCELLED
+        if self.future.done():
+            return FAILED if self.future.exception() is not None else DONE
+        return RUNNING if self.started is not None else QUEUED
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def elapsed(self):
+        """Час виконання (без очікування в черзі), секунди."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def error(self):
+        if not self.future.done() or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def _report_progress(self, fraction):
+        """Обробник timing.report_progress: оновлює прогрес і перериває скасовану задачу."""
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if self.cancel_requested:
+            raise JobCancelled(self.id)
+
+    def _run(self, fn, args, kwargs):
+        self.started = time.perf_counter()
+        try:
+            if self.cancel_requested:
+                raise JobCancelled(self.id)
+            with self.timer, progress_callback(self._report_progress):
+                result = fn(*args, **kwargs)
+            self.progress = 1.0
+            return result
+        finally:
+            self.finished = time.perf_counter()
+
+
+class SolveQueue:
+    """Пул воркерів з реєстром задач: submit, poll, cancel, wait.
+
+    Задачі з однаковим ``key`` (наприклад, ключем кешу результатів) не
+    дублюються: поки перша не завершилась, submit повертає її ж і додає
+    ``subscriber`` до її передплатників. Скасування від передплатника лише
+    відписує його, а задача зупиняється, коли не лишилось жодного.
+
+    Завершена задача тримає свій результат, тож після того як усі
+    передплатники забрали його, задачу слід прибрати з реєстру через
+    ``release``. Незабрані задачі (закриті сесії) витісняються, коли
+    завершених більше за ``history``.
+    """
+
+    def __init__(self, workers=None, history=64):
+        self.workers = workers or os.cpu_count() or 1
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="solve")
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label=None, key=None, subscriber=None, **kwargs):
+        with self._lock:
+            if key is not None:
+                existing = self._jobs.get(self._by_key.get(key))
+                if existing is not None and not existing.done and not existing.cancel_requested:
+                    if subscriber is not None:
+                        existing.subscribers.add(subscriber)
+                    return existing
+            job = Job(label or getattr(fn, "__name__", "job"), key)
+            if subscriber is not None:
+                job.subscribers.add(subscriber)
+            job.future = self._executor.submit(job._run, fn, args, kwargs)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._by_key[key] = job.id
+            self._prune()
+        return job
+
+    def poll(self, job_id):
+        """Задача за id або None, якщо її вже витіснено з реєстру."""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id, subscriber=None):
+        """Скасовує задачу: з черги вона знімається одразу, запущена зупиняється
+        на найближчому timing.report_progress.
+
+        З ``subscriber`` лише відписує його; задача скасовується, коли інших
+        передплатників не лишилось. Повертає True, якщо задачу скасовано.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            if subscriber is not None:
+                job.subscribers.discard(subscriber)
+                if job.subscribers:
+                    return False
+            job.cancel_requested = True
+            job.future.cancel()
+            return True
+
+    def release(self, job_id, subscriber=None):
+        """Відписує ``subscriber`` від задачі; завершена задача без передплатників
+        (або з ``subscriber=None``) видаляється з реєстру разом з результатом."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if subscriber is not None:
+                job.subscribers.discard(subscriber)
+            if job.done and (subscriber is None or not job.subscribers):
+                self._forget(job_id)
+
+    def wait(self, jobs, timeout=None):
+        """Чекає завершення задач не довше ``timeout`` секунд; повертає True, якщо всі готові."""
+        futures = [job.future for job in jobs]
+        _, pending = wait_futures(futures, timeout=timeout)
+        return not pending
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        states = [job.state for job in jobs]
+        return {
+            "workers": self.workers,
+            "queued": states.count(QUEUED),
+            "running": states.count(RUNNING),
+            "done": states.count(DONE),
+            "failed": states.count(FAILED),
+            "cancelled": states.count(CANCELLED),
+        }
+
+    def shutdown(self, wait=True):
+        for job in list(self._jobs.values()):
+            if not job.done:
+                job.cancel_requested = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            self._forget(job_id)
+
+    def _forget(self, job_id):
+        job = self._jobs.pop(job_id)
+        if job.key is not None and self._by_key.get(job.key) == job_id:
+            del self._by_key[job.key]
+
+
+def job_result(job):
+    """Результат завершеної задачі; для скасованої - JobCancelled."""
+    try:
+        return job.result()
+    except CancelledError:
+        raise JobCancelled(job.id) from None
+
+
+# Модульна черга спільна для всіх сесій Streamlit у межах процесу
+default_queue = SolveQueue(workers=int(os.environ.get(WORKERS_ENV, 0)) or None)
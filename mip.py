@@ -0,0 +1,431 @@
+"""Цілочисельний (MIP) режим оптимізації для реальних одиниць закупівлі.
+
+Неперервна модель допускає будь-яку суму на інструмент, а реальні закупівлі
+робляться пакетами показів, з мінімальними замовленнями та фіксованою
+вартістю запуску каналу. Необов'язкові колонки таблиці інструментів:
+
+* PackageSize - розмір пакета (покази). Бюджет інструмента кратний ціні
+  пакета PackageSize / 1000 * CPM; 0 - довільна сума;
+* MinSpend - мінімальне замовлення ($), якщо інструмент активний;
+* SetupCost - фіксована вартість активації ($), входить у загальний бюджет.
+
+Кожен інструмент має бінарну змінну активації. MinShare/MaxShare діють так
+само, як у неперервній моделі, тому інструмент з MinShare > 0 завжди активний;
+для вибору каналів "увімкнено/вимкнено" MinShare має бути 0.
+
+CBC стартує із заокругленого LP-розв'язку. Якщо ліміт часу вичерпано, повертається
+найкращий знайдений план зі статусом STATUS_FEASIBLE. Якщо CBC не знайшов
+жодного плану, повертається сам заокруглений LP-план, якщо він допустимий.
+Мінімізація бюджету без допустимого стартового плану має лише евристичну
+межу big-M, тож "недопустимо" за нею звітується як STATUS_NOT_SOLVED.
+"""
+
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pulp import (
+    PULP_CBC_CMD,
+    LpAffineExpression,
+    LpBinary,
+    LpInteger,
+    LpMaximize,
+    LpMinimize,
+    LpProblem,
+    LpSolutionIntegerFeasible,
+    LpSolutionOptimal,
+    LpStatus,
+    LpStatusInfeasible,
+    LpStatusNotSolved,
+    LpVariable,
+    PulpSolverError,
+)
+
+from optimizer import (
+    GOAL_MAX_TOTAL_REACH,
+    GOAL_MIN_BUDGET,
+    STATUS_FEASIBLE,
+    STATUS_INFEASIBLE,
+    STATUS_OPTIMAL,
+    Instruments,
+    SolveResult,
+    greedy_fill,
+    make_result,
+    normalize_goal,
+    overlap_weights,
+    solve_native,
+)
+from timing import stage
+
+PACKAGE_COLUMN = "PackageSize"
+MIN_SPEND_COLUMN = "MinSpend"
+SETUP_COST_COLUMN = "SetupCost"
+UNIT_COLUMNS = [PACKAGE_COLUMN, MIN_SPEND_COLUMN, SETUP_COST_COLUMN]
+
+# Межа загального медіабюджету для обмежень активації в моделі мінімізації бюджету.
+# Якщо заокруглений LP-план допустимий, межею є його вартість (точна межа для оптимуму),
+# інакше - BIG_M_FACTOR x бюджет LP-розв'язку. Евристику можна перевизначити через MipOptions.big_m.
+BIG_M_FACTOR = 10.0
+
+FEASIBILITY_TOL = 1e-6
+
+# Скільки разів подвоюється бюджет, поки масштабований план не стане допустимим
+MAX_SCALE_DOUBLINGS = 60
+
+# CBC не знайшов плану, але за евристичної межі big-M це не доводить недопустимість
+STATUS_NOT_SOLVED = LpStatus[LpStatusNotSolved]
+
+
+@dataclass(frozen=True)
+class BuyingUnits:
+    """Колонки одиниць закупівлі, вирівняні з Instruments."""
+
+    package_size: np.ndarray
+    min_spend: np.ndarray
+    setup_cost: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df):
+        """Відсутні колонки та порожні клітинки - нулі (без пакетів, мінімуму та фіксованих витрат)."""
+        def column(name):
+            if name not in df.columns:
+                return np.zeros(len(df))
+            return pd.to_numeric(df[name], errors="coerce").fillna(0.0).clip(lower=0.0).to_numpy(dtype=float)
+
+        return cls(
+            package_size=column(PACKAGE_COLUMN),
+            min_spend=column(MIN_SPEND_COLUMN),
+            setup_cost=column(SETUP_COST_COLUMN),
+        )
+
+    def package_cost(self, instruments):
+        """Ціна одного пакета ($); 0 - інструмент купується довільною сумою."""
+        return self.package_size / 1000 * instruments.cpm
+
+    def fingerprint(self):
+        """Стабільний хеш для ключів кешу результатів."""
+        columns = np.stack([self.package_size, self.min_spend, self.setup_cost]) + 0.0
+        return hashlib.sha256(np.ascontiguousarray(columns, dtype='<f8').tobytes()).hexdigest()
+
+
+@dataclass(frozen=True)
+class MipOptions:
+    """Параметри CBC для цілочисельного режиму.
+
+    ``time_limit`` - секунди (None - без ліміту); ``gap_rel`` - допустимий
+    відносний розрив MIP (0.01 = 1%); ``threads`` - кількість потоків CBC;
+    ``big_m`` - ручна межа загального медіабюджету в моделі мінімізації
+    бюджету (див. BIG_M_FACTOR).
+    """
+
+    time_limit: float = None
+    gap_rel: float = None
+    threads: int = None
+    warm_start: bool = True
+    big_m: float = None
+
+
+def build_mip_model(instruments, units, goal, budget_or_target, total_audience, big_m=None):
+    """Будує MIP-модель; повертає (model, budget_vars, active_vars, package_vars).
+
+    ``package_vars`` - dict {індекс інструмента: цілочисельна змінна пакетів}
+    лише для інструментів з пакетами. ``big_m`` обов'язковий для мінімізації бюджету.
+    """
+    goal = normalize_goal(goal)
+    n = len(instruments)
+    package_cost = units.package_cost(instruments)
+    budget_vars = [LpVariable(f"Budget_{i}", lowBound=0) for i in range(n)]
+    active_vars = [LpVariable(f"Active_{i}", cat=LpBinary) for i in range(n)]
+    package_vars = {
+        i: LpVariable(f"Packages_{i}", lowBound=0, cat=LpInteger)
+        for i in np.flatnonzero(package_cost > 0).tolist()
+    }
+    unique_reach = LpAffineExpression(zip(budget_vars, instruments.reach_per_dollar.tolist()))
+    media_budget_expr = LpAffineExpression((var, 1.0) for var in budget_vars)
+    setup_expr = LpAffineExpression(zip(active_vars, units.setup_cost.tolist()))
+
+    if goal == GOAL_MIN_BUDGET:
+        if big_m is None:
+            raise ValueError("Для мінімізації бюджету в цілочисельному режимі потрібна межа big_m.")
+        reach_target_people = total_audience * (budget_or_target / 100)
+
+        model = LpProblem("Minimize_Budget_for_Reach_Target_MIP", LpMinimize)
+        model += media_budget_expr + setup_expr, "Total_Budget"
+        model += unique_reach >= reach_target_people, "Total_Unique_Reach_Constraint"
+
+        # Частки рахуються відносно медіабюджету (без фіксованих витрат на запуск)
+        total_var = LpVariable("Total_Budget_Var", lowBound=0)
+        model += total_var == media_budget_expr, "Total_Budget_Definition"
+        for i, var in enumerate(budget_vars):
+            model += var >= float(instruments.min_share[i]) * total_var, f"Min_Share_{i}"
+            model += var <= float(instruments.max_share[i]) * total_var, f"Max_Share_{i}"
+            # Бюджет інструмента не перевищує MaxShare від межі загального бюджету
+            model += var <= float(min(max(instruments.max_share[i], 0.0), 1.0) * big_m) * active_vars[i], f"Activation_{i}"
+    else:
+        total_budget = budget_or_target
+
+        model = LpProblem("Maximize_Reach_MIP", LpMaximize)
+        model += unique_reach, "Total_Unique_Reach"
+        model += media_budget_expr + setup_expr <= total_budget, "Total_Budget_Constraint"
+
+        for i, var in enumerate(budget_vars):
+            model += var >= float(instruments.min_share[i]) * total_budget, f"Min_Share_{i}"
+            model += var <= float(instruments.max_share[i]) * total_budget, f"Max_Share_{i}"
+            # Тут природна межа активації - MaxShare від заданого бюджету, big-M не потрібен
+            model += var <= float(max(instruments.max_share[i], 0.0) * total_budget) * active_vars[i], f"Activation_{i}"
+
+    for i, var in enumerate(budget_vars):
+        if units.min_spend[i] > 0:
+            model += var >= float(units.min_spend[i]) * active_vars[i], f"Min_Spend_{i}"
+    for i, packages in package_vars.items():
+        model += budget_vars[i] == float(package_cost[i]) * packages, f"Package_{i}"
+
+    return model, budget_vars, active_vars, package_vars
+
+
+def round_plan(instruments, units, goal, budget_or_target, lp_budgets):
+    """Переводить LP-розв'язок у цілі пакети та мінімальні замовлення.
+
+    Для максимізації охоплення пакети округлюються вниз (нижні межі - вгору), а фіксовані витрати
+    покриваються зменшенням найменш ефективних інструментів. Для мінімізації
+    бюджету пакети округлюються вгору. Допустимість плану перевіряє plan_is_feasible.
+    """
+    package_cost = units.package_cost(instruments)
+    has_packages = package_cost > 0
+    safe_cost = np.where(has_packages, package_cost, 1.0)
+    budgets = np.asarray(lp_budgets, dtype=float).copy()
+
+    if goal == GOAL_MIN_BUDGET:
+        # Охоплення лише зростає, якщо активні інструменти підняти до мінімального замовлення
+        budgets = np.maximum(budgets, np.where(budgets > 0, units.min_spend, 0.0))
+        packages = np.ceil(budgets / safe_cost - FEASIBILITY_TOL)
+        budgets = np.where(has_packages, packages * safe_cost, budgets)
+        return _repair_shares(instruments, units, budgets, has_packages, safe_cost, lp_budgets)
+    else:
+        total_budget = budget_or_target
+        # Інструменти, нижчі за мінімальне замовлення, вимикаються, якщо MinShare це дозволяє
+        below_minimum = (budgets < units.min_spend) & (instruments.min_share <= 0)
+        # Обов'язкові інструменти (MinShare > 0) отримують щонайменше мінімальне замовлення
+        lower = np.maximum(instruments.min_share * total_budget, np.where(instruments.min_share > 0, units.min_spend, 0.0))
+        lower = np.maximum(lower, 0.0)
+        # Нижні межі одразу в цілих пакетах, щоб округлення вгору не вивело план за бюджет
+        lower = np.where(has_packages, np.ceil(lower / safe_cost - FEASIBILITY_TOL) * safe_cost, lower)
+        upper = np.where(below_minimum, lower, instruments.max_share * total_budget)
+        # LP розподіляє весь бюджет; фіксовані витрати активних каналів віднімаються від нього
+        setup = units.setup_cost[(budgets > 0) & ~below_minimum].sum()
+        budgets = greedy_fill(instruments.reach_per_dollar, lower, upper, max(total_budget - setup - lower.sum(), 0.0), positive_only=True)
+        packages = np.floor(budgets / safe_cost + FEASIBILITY_TOL)
+
+    budgets = np.where(has_packages, packages * safe_cost, budgets)
+    # Після округлення вниз частина інструментів може опинитися нижче мінімального замовлення
+    return np.where((budgets < units.min_spend) & (instruments.min_share <= 0), 0.0, budgets)
+
+
+def _repair_shares(instruments, units, budgets, has_packages, safe_cost, lp_budgets):
+    """Відновлює частки після округлення вгору в моделі мінімізації бюджету.
+
+    Округлення змінює загальний бюджет, тож частки можуть вийти за MinShare/MaxShare.
+    Інструменти нижче MinShare піднімаються до неї, а якщо хтось перевищує MaxShare,
+    вмикається найефективніший неактивний інструмент. Охоплення при цьому лише росте.
+    Якщо локального ремонту не вистачає (наприклад, велике мінімальне замовлення
+    обов'язкового інструмента витісняє частки інших), план будується _scaled_plan.
+    """
+    efficiency_order = np.argsort(-instruments.reach_per_dollar, kind='stable')
+    candidates = (instruments.reach_per_dollar > 0) & (instruments.max_share > 0)
+    for _ in range(len(budgets) + 1):
+        total = budgets.sum()
+        low = budgets < instruments.min_share * total * (1 - FEASIBILITY_TOL)
+        if low.any():
+            target = np.maximum(instruments.min_share * total, units.min_spend)
+            raised = np.where(has_packages, np.ceil(target / safe_cost - FEASIBILITY_TOL) * safe_cost, target)
+            budgets = np.where(low, raised, budgets)
+            continue
+        if not np.any(budgets > instruments.max_share * total * (1 + FEASIBILITY_TOL)):
+            break
+        inactive = efficiency_order[(budgets[efficiency_order] <= 0) & candidates[efficiency_order]]
+        if len(inactive) == 0:
+            break
+        i = inactive[0]
+        budgets = budgets.copy()
+        # Інструмент вмикається щонайменше з мінімальним замовленням, а без нього - з рівною часткою
+        amount = units.min_spend[i] if units.min_spend[i] > 0 else total / max(np.count_nonzero(budgets), 1)
+        if has_packages[i]:
+            # Щонайменше один цілий пакет, інакше план не пройде plan_is_feasible
+            amount = max(np.ceil(amount / safe_cost[i] - FEASIBILITY_TOL), 1.0) * safe_cost[i]
+        budgets[i] = amount
+
+    target = lp_budgets @ instruments.reach_per_dollar
+    if _shares_feasible(instruments, units, budgets) and budgets @ instruments.reach_per_dollar >= target * (1 - FEASIBILITY_TOL):
+        return budgets
+    scaled = _scaled_plan(instruments, units, lp_budgets, has_packages, safe_cost)
+    return budgets if scaled is None else scaled
+
+
+def _shares_feasible(instruments, units, budgets, tol=FEASIBILITY_TOL):
+    """Частки, мінімальні замовлення та цілі пакети плану мінімізації бюджету."""
+    return plan_is_feasible(instruments, units, GOAL_MIN_BUDGET, 0.0, 0.0, budgets, tol)
+
+
+def _scaled_plan(instruments, units, lp_budgets, has_packages, safe_cost):
+    """Допустимий план мінімізації бюджету масштабуванням внутрішніх часток.
+
+    Частки - середнє LP-часток і центру меж MinShare/MaxShare, тож вони строго
+    всередині меж (якщо MinShare < MaxShare). Бюджет подвоюється, доки округлення
+    пакетів вгору не перестане виводити частки за межі, а мінімальні замовлення
+    не будуть покриті. Охоплення не менше LP-цілі, бо бюджети не менші за частки x T.
+    Повертає None, якщо за MAX_SCALE_DOUBLINGS подвоєнь план не знайдено
+    (наприклад, MinShare = MaxShare у двох інструментів з пакетами різної ціни).
+    """
+    lp_total = lp_budgets.sum()
+    if lp_total <= 0:
+        return None
+    lp_shares = lp_budgets / lp_total
+    lower = np.maximum(instruments.min_share, 0.0)
+    upper = np.clip(instruments.max_share, lower, 1.0)
+    # Спершу лише інструменти LP-плану та обов'язкові, щоб не вмикати зайвих мінімальних замовлень
+    subset = (lp_shares > 0) | (lower > 0)
+    if upper[subset].sum() <= lower[subset].sum() + FEASIBILITY_TOL:
+        subset = np.ones(len(lower), dtype=bool)
+    lower, upper = np.where(subset, lower, 0.0), np.where(subset, upper, 0.0)
+    room = upper.sum() - lower.sum()
+    center = lower + (upper - lower) * ((1 - lower.sum()) / room if room > 0 else 0.0)
+    shares = (lp_shares + center) / 2
+
+    target = lp_budgets @ instruments.reach_per_dollar
+    efficiency = shares @ instruments.reach_per_dollar
+    if efficiency <= 0:
+        return None
+    active = shares > 0
+    total = max(target / efficiency, lp_total, np.max(units.min_spend[active] / shares[active], initial=0.0))
+    for _ in range(MAX_SCALE_DOUBLINGS):
+        budgets = shares * total
+        budgets = np.where(has_packages, np.ceil(budgets / safe_cost - FEASIBILITY_TOL) * safe_cost, budgets)
+        if _shares_feasible(instruments, units, budgets):
+            return budgets
+        total *= 2
+    return None
+
+
+def plan_is_feasible(instruments, units, goal, budget_or_target, total_audience, budgets, tol=FEASIBILITY_TOL):
+    """Чи задовольняє план усі обмеження MIP-моделі (з відносним допуском ``tol``)."""
+    budgets = np.asarray(budgets, dtype=float)
+    active = budgets > tol
+    package_cost = units.package_cost(instruments)
+    scale = max(1.0, float(budgets.sum()))
+    if np.any(budgets < -tol * scale) or np.any(active & (budgets < units.min_spend - tol * scale)):
+        return False
+    with np.errstate(divide='ignore', invalid='ignore'):
+        packages = np.where(package_cost > 0, budgets / package_cost, 0.0)
+    if np.any(np.abs(packages - np.round(packages)) > 1e-6):
+        return False
+
+    if goal == GOAL_MIN_BUDGET:
+        share_base = budgets.sum()
+        reach_target_people = total_audience * (budget_or_target / 100)
+        if budgets @ instruments.reach_per_dollar < reach_target_people * (1 - tol):
+            return False
+    else:
+        share_base = budget_or_target
+        if budgets.sum() + units.setup_cost[active].sum() > budget_or_target + tol * scale:
+            return False
+    return bool(
+        np.all(budgets >= instruments.min_share * share_base - tol * scale)
+        and np.all(budgets <= instruments.max_share * share_base + tol * scale)
+    )
+
+
+def make_mip_result(instruments, units, goal, budgets, total_audience, status, weights=None):
+    result = make_result(instruments, goal, budgets, total_audience, weights)
+    package_cost = units.package_cost(instruments)
+    active = budgets > FEASIBILITY_TOL
+    table = result.table
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table["Packages"] = np.where(package_cost > 0, np.round(budgets / package_cost), np.nan)
+    table["Active"] = active
+    table["SetupCost"] = np.where(active, units.setup_cost, 0.0)
+    # Загальний бюджет включає фіксовані витрати на запуск каналів
+    result.total_budget = float(budgets.sum() + table["SetupCost"].sum())
+    result.status = status
+    return result
+
+
+def solve_mip(instruments, goal, budget_or_target, total_audience, units=None, options=None, overlap=None):
+    """Цілочисельний розв'язок лінійних моделей спліту.
+
+    ``instruments`` - таблиця інструментів (DataFrame з необов'язковими
+    колонками UNIT_COLUMNS) або Instruments разом з ``units``. ``options`` -
+    MipOptions. Статус результату - STATUS_OPTIMAL (оптимум у межах gap_rel)
+    або STATUS_FEASIBLE, якщо CBC зупинено за лімітом часу.
+    """
+    if units is None:
+        if not isinstance(instruments, pd.DataFrame):
+            raise ValueError("Без таблиці інструментів потрібно передати units.")
+        units = BuyingUnits.from_frame(instruments)
+    options = options or MipOptions()
+    with stage("instrument_arrays"):
+        instruments = Instruments.coerce(instruments)
+    weights = overlap_weights(overlap, len(instruments))
+    goal = normalize_goal(goal)
+    if goal == GOAL_MAX_TOTAL_REACH:
+        raise ValueError("Цілочисельний режим підтримує лише лінійні моделі охоплення та бюджету.")
+    if goal == GOAL_MIN_BUDGET and budget_or_target <= 0:
+        raise ValueError("Цільовий відсоток охоплення має бути більше 0%.")
+
+    # Цілочисельні обмеження лише звужують LP-модель, тож недопустима LP означає недопустимий MIP
+    with stage("native_solve"):
+        lp_budgets = solve_native(instruments, goal, budget_or_target, total_audience)
+    if lp_budgets is None:
+        return SolveResult(goal=goal, status=STATUS_INFEASIBLE)
+
+    start = round_plan(instruments, units, goal, budget_or_target, lp_budgets)
+    start_feasible = plan_is_feasible(instruments, units, goal, budget_or_target, total_audience, start)
+
+    big_m = options.big_m
+    if goal == GOAL_MIN_BUDGET and big_m is None:
+        big_m = start.sum() + units.setup_cost[start > FEASIBILITY_TOL].sum() if start_feasible else BIG_M_FACTOR * lp_budgets.sum()
+
+    with stage("build_model"):
+        model, budget_vars, active_vars, package_vars = build_mip_model(
+            instruments, units, goal, budget_or_target, total_audience, big_m=big_m,
+        )
+    if options.warm_start and start_feasible:
+        package_cost = units.package_cost(instruments)
+        if goal == GOAL_MIN_BUDGET:
+            model.variablesDict()["Total_Budget_Var"].setInitialValue(float(start.sum()))
+        for i, var in enumerate(budget_vars):
+            var.setInitialValue(float(start[i]))
+            active_vars[i].setInitialValue(1 if start[i] > FEASIBILITY_TOL else 0)
+        for i, var in package_vars.items():
+            var.setInitialValue(round(start[i] / package_cost[i]))
+
+    warm_start = options.warm_start and start_feasible
+    solver = PULP_CBC_CMD(
+        msg=False,
+        timeLimit=options.time_limit,
+        gapRel=options.gap_rel,
+        threads=options.threads,
+        warmStart=warm_start,
+    )
+    with stage("cbc_solve"):
+        try:
+            status = model.solve(solver)
+        except PulpSolverError:
+            if not warm_start:
+                raise
+            # CBC зрідка падає з MIP start на великих моделях. Повторний запуск подвоїв би
+            # затримку, тому повертаємо заокруглений LP-план (він допустимий)
+            status = None
+
+    if status is not None and model.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+        budgets = np.array([var.varValue or 0.0 for var in budget_vars])
+        result_status = STATUS_OPTIMAL if model.sol_status == LpSolutionOptimal else STATUS_FEASIBLE
+    elif start_feasible:
+        # CBC не встиг знайти план за ліміт часу (або впав) - повертаємо заокруглений LP-план
+        budgets, result_status = start, STATUS_FEASIBLE
+    elif goal == GOAL_MIN_BUDGET and status == LpStatusInfeasible:
+        # Без допустимого старту межа big-M евристична і може бути нижчою за оптимум
+        return SolveResult(goal=goal, status=STATUS_NOT_SOLVED)
+    else:
+        return SolveResult(goal=goal, status=LpStatus[status])
+    return make_mip_result(instruments, units, goal, budgets, total_audience, result_status, weights)
@@ -0,0 +1,665 @@
+"""Безголовий (без Streamlit) движок оптимізації digital-спліту.
+
+Модуль містить усю математику з app_new.py: побудову LP-моделі, розрахунок
+нелінійного охоплення та похідних колонок результату. Його можна імпортувати
+з нічних batch-задач без завантаження Streamlit.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pulp import (
+    PULP_CBC_CMD,
+    LpAffineExpression,
+    LpMaximize,
+    LpMinimize,
+    LpProblem,
+    LpSolution,
+    LpSolutionIntegerFeasible,
+    LpStatus,
+    LpStatusInfeasible,
+    LpStatusOptimal,
+    LpVariable,
+)
+
+from timing import report_progress, stage
+
+GOAL_MAX_REACH = 'Максимізація охоплення'
+GOAL_MIN_BUDGET = 'Мінімізація бюджету'
+GOAL_MAX_TOTAL_REACH = 'Максимізація фактичного охоплення'
+
+# Короткі англійські псевдоніми для batch-задач
+GOAL_ALIASES = {
+    'max_reach': GOAL_MAX_REACH,
+    'min_budget': GOAL_MIN_BUDGET,
+    'max_total_reach': GOAL_MAX_TOTAL_REACH,
+}
+
+INPUT_COLUMNS = ["Instrument", "CPM", "Freq", "MinShare", "MaxShare"]
+
+BACKENDS = ('auto', 'native', 'pulp')
+
+STATUS_OPTIMAL = LpStatus[LpStatusOptimal]
+STATUS_INFEASIBLE = LpStatus[LpStatusInfeasible]
+# Допустимий, але не доведено оптимальний план (MIP зупинено за лімітом часу)
+STATUS_FEASIBLE = LpSolution[LpSolutionIntegerFeasible]
+
+
+def normalize_goal(goal):
+    goal = GOAL_ALIASES.get(goal, goal)
+    if goal not in (GOAL_MAX_REACH, GOAL_MIN_BUDGET, GOAL_MAX_TOTAL_REACH):
+        raise ValueError(f"Невідома мета оптимізації: {goal!r}")
+    return goal
+
+
+@dataclass(frozen=True)
+class Instruments:
+    """Колонкове (масивне) представлення таблиці інструментів."""
+
+    names: np.ndarray
+    cpm: np.ndarray
+    freq: np.ndarray
+    min_share: np.ndarray
+    max_share: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df):
+        missing = [col for col in INPUT_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"У таблиці інструментів бракує колонок: {', '.join(missing)}")
+        return cls(
+            names=df["Instrument"].astype(str).to_numpy(),
+            cpm=df["CPM"].to_numpy(dtype=float),
+            freq=df["Freq"].to_numpy(dtype=float),
+            min_share=df["MinShare"].to_numpy(dtype=float),
+            max_share=df["MaxShare"].to_numpy(dtype=float),
+        )
+
+    @classmethod
+    def coerce(cls, instruments):
+        if isinstance(instruments, cls):
+            return instruments
+        if isinstance(instruments, pd.DataFrame):
+            return cls.from_frame(instruments)
+        return cls.from_frame(pd.DataFrame(instruments))
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def reach_per_dollar(self):
+        # Унікальне охоплення (людей) на 1 $: 1000 / (CPM * Freq).
+        # Інструмент з нульовим CPM або Freq не дає охоплення в лінійному наближенні.
+        denom = self.cpm * self.freq
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(denom != 0, 1000 / denom, 0.0)
+
+    def to_frame(self):
+        return pd.DataFrame({
+            "Instrument": self.names,
+            "CPM": self.cpm,
+            "Freq": self.freq,
+            "MinShare": self.min_share,
+            "MaxShare": self.max_share,
+        })
+
+
+@dataclass
+class SolveResult:
+    goal: str
+    status: str
+    table: pd.DataFrame = None
+    total_budget: float = float('nan')
+    total_reach: float = float('nan')
+    linear_reach: float = float('nan')
+
+    @property
+    def ok(self):
+        return self.status in (STATUS_OPTIMAL, STATUS_FEASIBLE)
+
+
+def overlap_weights(overlap, n):
+    """Ваги дублювання w_i для моделі охоплення 1 - добуток (1 - reach_i) ** w_i.
+
+    ``overlap`` - None (незалежні канали), готовий вектор ваг форми (n,) або
+    матриця перетину аудиторій (n, n): M_ij у [0, 1] - ступінь дублювання
+    аудиторій i та j (0 - незалежні, 1 - повністю однакові). Тоді
+    w_i = 1 / (1 + sum_{j != i} M_ij), тобто k однакових повністю
+    дубльованих каналів дають охоплення одного з них.
+    """
+    if overlap is None:
+        return None
+    overlap = np.asarray(overlap, dtype=float)
+    if overlap.ndim == 1:
+        if overlap.shape != (n,):
+            raise ValueError(f"Вектор ваг дублювання має містити {n} значень, а не {len(overlap)}.")
+        return overlap
+    if overlap.shape != (n, n):
+        raise ValueError(f"Матриця перетину має бути {n}x{n}, а не {overlap.shape[0]}x{overlap.shape[1]}.")
+    matrix = np.clip(overlap, 0.0, 1.0)
+    return 1 / (1 + matrix.sum(axis=1) - np.diagonal(matrix))
+
+
+def group_overlap_weights(groups, duplication):
+    """Ваги дублювання для кластерів інструментів без побудови матриці n x n.
+
+    Усередині групи кожна пара дублюється зі ступенем ``duplication`` (число
+    або dict група -> число), між групами канали незалежні. Інструменти без
+    групи (None/NaN) вважаються окремими групами.
+    """
+    groups = pd.Series(groups, dtype=object)
+    codes, _ = pd.factorize(groups)
+    sizes = np.bincount(codes[codes >= 0], minlength=1)
+    group_size = np.where(codes >= 0, sizes[np.maximum(codes, 0)], 1)
+    if isinstance(duplication, dict):
+        rho = groups.map(duplication).astype(float).fillna(0.0).to_numpy()
+    else:
+        rho = np.full(len(groups), float(duplication))
+    return 1 / (1 + np.clip(rho, 0.0, 1.0) * (group_size - 1))
+
+
+def combine_reach(reach_i, weights=None):
+    """1 - добуток (1 - reach_i) ** w_i по останній осі (w_i = 1 - незалежні канали)."""
+    # Обмеження reach_i значенням 1.0, щоб уникнути помилок в np.prod (1 - reach_i)
+    reach_i = np.clip(reach_i, 0.0, 1.0)
+    if weights is None:
+        return 1 - np.prod(1 - reach_i, axis=-1)
+    return 1 - np.prod((1 - reach_i) ** weights, axis=-1)
+
+
+def total_reach(budgets, cpm, freq, total_audience, overlap=None):
+    """Загальне охоплення за формулою 1 - добуток (1 - reach_i).
+
+    Рахує по останній осі, тому матриця бюджетів (сценарії x інструменти)
+    оцінюється одним викликом. ``overlap`` враховує перетин аудиторій
+    (див. overlap_weights).
+    """
+    budgets = np.asarray(budgets, dtype=float)
+    cpm = np.asarray(cpm, dtype=float)
+    freq = np.asarray(freq, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Обчислення показників Impression. Уникаємо ділення на нуль, якщо CPM дорівнює 0.
+        impressions = np.where(cpm != 0, budgets / cpm * 1000, 0)
+        # Обчислення Reach_i. Уникаємо ділення на нуль, якщо Freq дорівнює 0.
+        reach_i = np.where(freq != 0, impressions / freq / total_audience, 0)
+
+    return combine_reach(reach_i, overlap_weights(overlap, reach_i.shape[-1]))
+
+
+def result_table(instruments, budgets, total_audience, share_base=None):
+    """Таблиця результату з похідними колонками (Impressions, Unique Reach, ReachPct)."""
+    df_result = instruments.to_frame()
+    cpm, freq = instruments.cpm, instruments.freq
+
+    # Розрахунок ефективності та CPR (як і в інтерфейсі, нульові значення дають inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df_result["Efficiency"] = 1000 / (cpm * freq)
+        df_result["CPR"] = np.where(freq != 0, cpm / 1000 * freq, np.inf)
+
+        budgets = np.asarray(budgets, dtype=float)
+        df_result["Budget"] = budgets
+
+        if share_base is None:
+            share_base = budgets.sum()
+        df_result["BudgetSharePct"] = budgets / share_base if share_base > 0 else 0
+
+        impressions = np.where(cpm != 0, budgets / cpm * 1000, 0)
+        df_result["Impressions"] = impressions
+        unique_reach = np.where(freq != 0, impressions / freq, 0)
+        df_result["Unique Reach (People)"] = unique_reach
+
+    # Обмеження відсотка охоплення до 100%
+    df_result["ReachPct"] = np.minimum(unique_reach / total_audience, 1.0)
+    return df_result
+
+
+def build_model(instruments, goal, budget_or_target, total_audience):
+    """Будує PuLP-модель з масивів інструментів; повертає (model, budget_vars)."""
+    goal = normalize_goal(goal)
+    n = len(instruments)
+    budget_vars = [LpVariable(f"Budget_{i}", lowBound=0) for i in range(n)]
+    unique_reach = LpAffineExpression(zip(budget_vars, instruments.reach_per_dollar.tolist()))
+    total_budget_expr = LpAffineExpression((var, 1.0) for var in budget_vars)
+
+    if goal == GOAL_MIN_BUDGET:
+        reach_target_people = total_audience * (budget_or_target / 100)
+
+        model = LpProblem("Minimize_Budget_for_Reach_Target", LpMinimize)
+        # Цільова функція: мінімізація загального бюджету
+        model += total_budget_expr, "Total_Budget"
+        model += unique_reach >= reach_target_people, "Total_Unique_Reach_Constraint"
+
+        # Частки рахуються відносно загальної суми змінних бюджету. Сума винесена
+        # в окрему змінну, щоб кожне обмеження мало 2 члени замість n.
+        total_var = LpVariable("Total_Budget_Var", lowBound=0)
+        model += total_var == total_budget_expr, "Total_Budget_Definition"
+        for i, var in enumerate(budget_vars):
+            model += var >= float(instruments.min_share[i]) * total_var, f"Min_Share_{i}"
+            model += var <= float(instruments.max_share[i]) * total_var, f"Max_Share_{i}"
+    else:
+        total_budget = budget_or_target
+
+        model = LpProblem("Maximize_Reach_LP_Approximation", LpMaximize)
+        # Цільова функція: максимізація суми індивідуальних унікальних охоплень
+        model += unique_reach, "Total_Unique_Reach"
+        model += total_budget_expr <= total_budget, "Total_Budget_Constraint"
+
+        # Частки рахуються відносно загального доступного бюджету. Це обмеження, а не
+        # межі змінних: CBC падає на суперечливих межах замість статусу Infeasible.
+        for i, var in enumerate(budget_vars):
+            model += var >= float(instruments.min_share[i]) * total_budget, f"Min_Share_{i}"
+            model += var <= float(instruments.max_share[i]) * total_budget, f"Max_Share_{i}"
+
+    return model, budget_vars
+
+
+def greedy_fill(weights, lower, upper, amount, positive_only=False):
+    """Розв'язок неперервного рюкзака: розподіляє ``amount`` понад нижні межі
+    в порядку спадання ваги, не виходячи за верхні межі.
+
+    Працює з пакетами: масиви форми (..., n), ``amount`` форми (...).
+    Якщо ``positive_only``, інструменти з вагою <= 0 не дозаповнюються.
+    """
+    weights = np.asarray(weights, dtype=float)
+    lower = np.asarray(lower, dtype=float)
+    order = np.argsort(-weights, axis=-1, kind='stable')
+    capacity = np.take_along_axis(np.asarray(upper, dtype=float) - lower, order, axis=-1)
+    if positive_only:
+        capacity = np.where(np.take_along_axis(weights, order, axis=-1) > 0, capacity, 0.0)
+    filled_before = np.cumsum(capacity, axis=-1) - capacity
+    fill_sorted = np.clip(np.asarray(amount, dtype=float)[..., None] - filled_before, 0.0, capacity)
+    fill = np.empty_like(fill_sorted)
+    np.put_along_axis(fill, order, fill_sorted, axis=-1)
+    return lower + fill
+
+
+def solve_native(instruments, goal, budget_or_target, total_audience):
+    """Точний розв'язок базових LP-моделей без CBC; повертає бюджети або None."""
+    budgets = solve_native_batch(instruments.reach_per_dollar, instruments.min_share, instruments.max_share, goal, budget_or_target, total_audience)
+    return None if np.isnan(budgets).any() else budgets
+
+
+def solve_native_batch(reach_per_dollar, min_share, max_share, goal, budget_or_target, total_audience):
+    """Нативний розв'язок для пакета сценаріїв.
+
+    Максимізація охоплення - це неперервний рюкзак: одне бюджетне обмеження та
+    межі MinShare/MaxShare * бюджет. Мінімізація бюджету однорідна за загальним
+    бюджетом T: бюджети = T * частки, тому достатньо знайти частки з
+    максимальною ефективністю і T = ціль / ефективність.
+
+    ``reach_per_dollar`` має форму (..., n), частки - (n,) або (..., n).
+    Повертає бюджети форми (..., n); рядки недопустимих сценаріїв - NaN.
+    """
+    weights = np.asarray(reach_per_dollar, dtype=float)
+    min_share = np.broadcast_to(min_share, weights.shape)
+    max_share = np.broadcast_to(max_share, weights.shape)
+
+    if goal == GOAL_MIN_BUDGET:
+        lower = np.maximum(min_share, 0.0)
+        upper = max_share
+        lower_sum = lower.sum(axis=-1)
+        feasible = ~np.any(lower > upper, axis=-1) & (lower_sum <= 1) & (upper.sum(axis=-1) >= 1)
+        shares = greedy_fill(weights, lower, upper, 1 - lower_sum)
+        efficiency = np.sum(weights * shares, axis=-1)
+        feasible &= efficiency > 0
+        reach_target_people = total_audience * (budget_or_target / 100)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            budgets = shares * (reach_target_people / efficiency)[..., None]
+    else:
+        total_budget = budget_or_target
+        lower = np.maximum(min_share * total_budget, 0.0)
+        upper = max_share * total_budget
+        lower_sum = lower.sum(axis=-1)
+        feasible = ~np.any(lower > upper, axis=-1) & (lower_sum <= total_budget)
+        budgets = greedy_fill(weights, lower, upper, total_budget - lower_sum, positive_only=True)
+
+    return np.where(feasible[..., None], budgets, np.nan)
+
+
+# Кількість додаткових стартів нелінійної моделі: найсильніші інструменти, заповнені першими
+MULTI_START = 8
+# Скільки обмінів бюджетом між парами інструментів робить локальний пошук
+MAX_EXCHANGES = 200
+# Обмеження пам'яті матриці обмінів (донори x одержувачі) в одному блоці
+_EXCHANGE_BLOCK = 1 << 20
+
+
+def _log_remaining(rates, weight, budgets):
+    """w_i * log(1 - reach_i) - сепарабельна частина log(1 - охоплення)."""
+    return weight * np.log1p(-np.minimum(rates * budgets, 1 - 1e-12))
+
+
+def _mm_ascent(rates, weight, lower, upper, amount, budgets, best, reach_of, max_iter):
+    """Ітерації лінеаризації з точки ``budgets``; повертає (бюджети, охоплення)."""
+    for _ in range(max_iter):
+        remaining = 1 - np.clip(rates * budgets, 0.0, 1.0)
+        if np.any(remaining <= 0):
+            break  # Охоплення вже 100%
+        # Градієнт охоплення пропорційний w_i * rate_i / (1 - reach_i)
+        candidate = greedy_fill(weight * rates / remaining, lower, upper, amount, positive_only=True)
+        candidate_reach = reach_of(candidate)
+        if candidate_reach <= best + 1e-12:
+            break
+        budgets, best = candidate, candidate_reach
+    return budgets, best
+
+
+def _best_exchange(rates, weight, lower, upper, budgets):
+    """Найкращий перенос бюджету між парою інструментів; повертає (виграш, донор, одержувач, сума).
+
+    log(1 - охоплення) угнутий уздовж будь-якого переносу, тому оптимум переносу -
+    на кінці відрізка: донор спускається до нижньої межі або одержувач сягає верхньої.
+    """
+    donors = np.flatnonzero(budgets > lower + 1e-9)
+    receivers = np.flatnonzero(budgets < upper - 1e-9)
+    if len(donors) == 0 or len(receivers) == 0:
+        return 0.0, None, None, 0.0
+    current = _log_remaining(rates, weight, budgets)
+    room = upper[receivers] - budgets[receivers]
+    best = (0.0, None, None, 0.0)
+    step = max(1, _EXCHANGE_BLOCK // len(receivers))
+    for k in range(0, len(donors), step):
+        block = donors[k:k + step]
+        amount = np.minimum((budgets[block] - lower[block])[:, None], room[None, :])
+        after = (
+            _log_remaining(rates[block, None], weight[block, None], budgets[block, None] - amount)
+            + _log_remaining(rates[receivers], weight[receivers], budgets[receivers] + amount)
+        )
+        # Мінімізуємо log(1 - охоплення), тож виграш - на скільки він зменшився
+        gain = current[block, None] + current[receivers] - after
+        gain[block[:, None] == receivers[None, :]] = -np.inf
+        d, r = np.unravel_index(np.argmax(gain), gain.shape)
+        if gain[d, r] > best[0]:
+            best = (gain[d, r], block[d], receivers[r], amount[d, r])
+    return best
+
+
+def solve_total_reach(instruments, total_budget, total_audience, max_iter=100, start=None, weights=None,
+                      multi_start=MULTI_START, max_exchanges=MAX_EXCHANGES):
+    """Максимізує фактичне охоплення 1 - добуток (1 - clip(reach_i)); повертає бюджети або None.
+
+    Це мінімізація угнутої сепарабельної функції log(1 - охоплення) =
+    sum w_i log(1 - reach_i) на многограннику, тож задача неопукла: оптимум
+    лежить у вершині (усі інструменти на межах, крім одного), а локальних
+    вершин-оптимумів може бути кілька. Тому розв'язок шукається так:
+
+    * старти - розв'язок лінійної моделі, ``start`` (наприклад, сусідня точка
+      кривої) і ``multi_start`` планів, де один із найсильніших інструментів
+      заповнюється першим до верхньої межі;
+    * з кожного старту - ітерації лінеаризації (кожна - точний жадібний LP з
+      вагами-градієнтами, охоплення монотонно зростає);
+    * з найкращого - локальний пошук обмінами: бюджет переноситься між парою
+      інструментів до межі, поки це збільшує охоплення (до ``max_exchanges``
+      обмінів), і знову ітерації лінеаризації.
+
+    Результат - вершина, яку не покращує жоден парний обмін; глобальний оптимум
+    не гарантується (задача NP-складна), але на малих таблицях збігається з
+    повним перебором вершин. ``weights`` - ваги дублювання з overlap_weights().
+    """
+    # Частка аудиторії на 1 $ для кожного інструмента
+    rates = instruments.reach_per_dollar / total_audience
+    lower = np.maximum(instruments.min_share * total_budget, 0.0)
+    upper = instruments.max_share * total_budget
+    if np.any(lower > upper) or lower.sum() > total_budget:
+        return None
+
+    # Бюджет понад насичення (reach_i = 1) не додає охоплення, тому верхні межі обрізаються
+    with np.errstate(divide='ignore'):
+        saturation = np.where(rates > 0, 1 / rates, 0.0)
+    upper = np.maximum(lower, np.minimum(upper, saturation))
+    amount = total_budget - lower.sum()
+
+    weight = np.ones_like(rates) if weights is None else np.broadcast_to(np.asarray(weights, dtype=float), rates.shape)
+
+    def reach_of(budgets):
+        return combine_reach(rates * budgets, weights)
+
+    starts = [greedy_fill(rates * weight, lower, upper, amount, positive_only=True)]
+    if start is not None:
+        start = np.clip(start, lower, upper)
+        if start.sum() <= total_budget:
+            starts.append(start)
+    # Найсильніший внесок інструмента - охоплення на його верхній межі
+    contribution = weight * rates * (upper - lower)
+    for i in np.argsort(-contribution, kind='stable')[:multi_start]:
+        if contribution[i] <= 0:
+            break
+        priority = np.where(np.arange(len(rates)) == i, np.inf, rates * weight)
+        starts.append(greedy_fill(priority, lower, upper, amount, positive_only=True))
+
+    budgets, best = None, -np.inf
+    for point in starts:
+        point, point_reach = _mm_ascent(rates, weight, lower, upper, amount, point, reach_of(point), reach_of, max_iter)
+        if point_reach > best:
+            budgets, best = point, point_reach
+
+    for _ in range(max_exchanges):
+        if best >= 1.0:
+            break
+        gain, donor, receiver, moved = _best_exchange(rates, weight, lower, upper, budgets)
+        if donor is None or gain <= 1e-12:
+            break
+        candidate = budgets.copy()
+        candidate[donor] -= moved
+        candidate[receiver] += moved
+        candidate, candidate_reach = _mm_ascent(rates, weight, lower, upper, amount, candidate, reach_of(candidate), reach_of, max_iter)
+        if candidate_reach <= best + 1e-12:
+            break
+        budgets, best = candidate, candidate_reach
+    return budgets
+
+
+def solve_pulp(instruments, goal, budget_or_target, total_audience, extra_constraints=(), time_limit=None):
+    """Розв'язок через PuLP/CBC; повертає (статус, бюджети або None)."""
+    with stage("build_model"):
+        model, budget_vars = build_model(instruments, goal, budget_or_target, total_audience)
+        for constraint in extra_constraints:
+            constraint(model, budget_vars)
+    return solve_model(model, budget_vars, time_limit=time_limit)
+
+
+def solve_model(model, budget_vars, warm_start=False, time_limit=None):
+    """Запускає CBC; ``time_limit`` - ліміт часу в секундах (None - без ліміту)."""
+    with stage("cbc_solve"):
+        status = model.solve(PULP_CBC_CMD(msg=False, warmStart=warm_start, timeLimit=time_limit))
+    if status != LpStatusOptimal:
+        return LpStatus[status], None
+    return STATUS_OPTIMAL, np.array([var.varValue or 0.0 for var in budget_vars])
+
+
+def set_rhs(model, instruments, goal, budget_or_target, total_audience):
+    """Змінює лише праві частини обмежень моделі з build_model під новий бюджет/ціль."""
+    constraints = model.constraints
+    if goal == GOAL_MIN_BUDGET:
+        constraints["Total_Unique_Reach_Constraint"].constant = -total_audience * (budget_or_target / 100)
+        return
+    total_budget = budget_or_target
+    constraints["Total_Budget_Constraint"].constant = -total_budget
+    for i in range(len(instruments)):
+        constraints[f"Min_Share_{i}"].constant = -float(instruments.min_share[i]) * total_budget
+        constraints[f"Max_Share_{i}"].constant = -float(instruments.max_share[i]) * total_budget
+
+
+def make_result(instruments, goal, budgets, total_audience, weights=None):
+    with stage("result_table"):
+        table = result_table(instruments, budgets, total_audience)
+    with stage("total_reach"):
+        reach = float(total_reach(budgets, instruments.cpm, instruments.freq, total_audience, weights))
+    return SolveResult(
+        goal=goal,
+        status=STATUS_OPTIMAL,
+        table=table,
+        total_budget=float(budgets.sum()),
+        total_reach=reach,
+        linear_reach=float(table["Unique Reach (People)"].sum()),
+    )
+
+
+def solve(instruments, goal, budget_or_target, total_audience, backend='auto', extra_constraints=(), overlap=None, time_limit=None):
+    """Розв'язує одну задачу спліту.
+
+    ``budget_or_target`` - бюджет ($) для максимізації охоплення або бажаний
+    відсоток охоплення (%) для мінімізації бюджету.
+
+    ``extra_constraints`` - функції ``f(model, budget_vars)``, що додають до
+    PuLP-моделі власні обмеження. Бекенд ``auto`` використовує нативний
+    розв'язувач і переходить на PuLP лише за наявності таких обмежень.
+
+    ``overlap`` - матриця перетину аудиторій або ваги дублювання (див.
+    overlap_weights). Вона змінює фактичне охоплення у звіті та цільову функцію
+    нелінійної моделі; лінійні моделі за визначенням сумують охоплення каналів.
+
+    ``time_limit`` - ліміт часу CBC у секундах; нативні розв'язувачі працюють
+    за мілісекунди й ним не обмежуються.
+    """
+    with stage("instrument_arrays"):
+        instruments = Instruments.coerce(instruments)
+    weights = overlap_weights(overlap, len(instruments))
+    goal = normalize_goal(goal)
+    if backend not in BACKENDS:
+        raise ValueError(f"Невідомий бекенд: {backend!r}")
+    if goal == GOAL_MIN_BUDGET and budget_or_target <= 0:
+        raise ValueError("Цільовий відсоток охоплення має бути більше 0%.")
+    if backend == 'native' and extra_constraints:
+        raise ValueError("Нативний бекенд не підтримує додаткові обмеження.")
+    if goal == GOAL_MAX_TOTAL_REACH and (backend == 'pulp' or extra_constraints):
+        raise ValueError("Нелінійна модель охоплення розв'язується лише нативним бекендом.")
+
+    if goal == GOAL_MAX_TOTAL_REACH:
+        with stage("nonlinear_solve"):
+            budgets = solve_total_reach(instruments, budget_or_target, total_audience, weights=weights)
+        status = STATUS_OPTIMAL if budgets is not None else STATUS_INFEASIBLE
+    elif backend == 'pulp' or extra_constraints:
+        status, budgets = solve_pulp(instruments, goal, budget_or_target, total_audience, extra_constraints, time_limit)
+    else:
+        with stage("native_solve"):
+            budgets = solve_native(instruments, goal, budget_or_target, total_audience)
+        status = STATUS_OPTIMAL if budgets is not None else STATUS_INFEASIBLE
+
+    if budgets is None:
+        return SolveResult(goal=goal, status=status)
+    return make_result(instruments, goal, budgets, total_audience, weights)
+
+
+def backends_agree(instruments, goal, budget_or_target, total_audience, rtol=1e-6):
+    """Перевіряє, що нативний розв'язувач і CBC дають однаковий статус і оптимум."""
+    native = solve(instruments, goal, budget_or_target, total_audience, backend='native')
+    reference = solve(instruments, goal, budget_or_target, total_audience, backend='pulp')
+    if native.ok != reference.ok:
+        return False
+    if not native.ok:
+        return True
+    # Оптимальні спліти можуть відрізнятися при рівних ефективностях, тому порівнюємо цільову функцію
+    if native.goal == GOAL_MIN_BUDGET:
+        return bool(np.isclose(native.total_budget, reference.total_budget, rtol=rtol))
+    return bool(np.isclose(native.linear_reach, reference.linear_reach, rtol=rtol))
+
+
+def solve_many(scenarios, backend='auto'):
+    """Розв'язує послідовність сценаріїв.
+
+    Кожен сценарій - dict з ключами ``instruments``, ``goal``,
+    ``budget_or_target``, ``audience`` і необов'язковим ``overlap`` (або
+    кортеж у тому ж порядку).
+    Однакові таблиці інструментів перетворюються в масиви лише один раз.
+    """
+    converted = {}
+    results = []
+    for scenario in scenarios:
+        if isinstance(scenario, dict):
+            instruments = scenario["instruments"]
+            goal = scenario["goal"]
+            budget_or_target = scenario["budget_or_target"]
+            audience = scenario["audience"]
+            overlap = scenario.get("overlap")
+        else:
+            instruments, goal, budget_or_target, audience, *rest = scenario
+            overlap = rest[0] if rest else None
+
+        key = id(instruments)
+        if key not in converted:
+            converted[key] = (instruments, Instruments.coerce(instruments))
+        results.append(solve(converted[key][1], goal, budget_or_target, audience, backend=backend, overlap=overlap))
+    return results
+
+
+def frontier(instruments, goal, start, stop, steps, total_audience, backend='auto', extra_constraints=(), overlap=None, time_limit=None):
+    """Крива оптимальних сплітів для діапазону бюджетів або цільових охоплень.
+
+    Повертає таблицю: параметр точки (бюджет $ або ціль %), статус, загальний
+    бюджет, фактичне охоплення, лінійне охоплення та бюджет кожного інструмента.
+    Між точками змінюється лише права частина обмежень:
+
+    * лінійні моделі однорідні за параметром, тому нативний бекенд розв'язує
+      задачу один раз і масштабує спліт на всі точки;
+    * з PuLP модель будується один раз, у ній оновлюються праві частини, а CBC
+      стартує з розв'язку попередньої точки;
+    * нелінійна модель стартує з масштабованого розв'язку сусідньої точки.
+
+    ``time_limit`` діє на кожен виклик CBC окремо. Після кожної точки
+    викликається timing.report_progress, тож у фоновій черзі крива показує
+    прогрес і може бути скасована.
+    """
+    instruments = Instruments.coerce(instruments)
+    weights = overlap_weights(overlap, len(instruments))
+    goal = normalize_goal(goal)
+    if backend not in BACKENDS:
+        raise ValueError(f"Невідомий бекенд: {backend!r}")
+    if steps < 1:
+        raise ValueError("Кількість точок кривої має бути не менше 1.")
+    if goal == GOAL_MIN_BUDGET and min(start, stop) <= 0:
+        raise ValueError("Цільовий відсоток охоплення має бути більше 0%.")
+    if goal == GOAL_MAX_TOTAL_REACH and (backend == 'pulp' or extra_constraints):
+        raise ValueError("Нелінійна модель охоплення розв'язується лише нативним бекендом.")
+    if backend == 'native' and extra_constraints:
+        raise ValueError("Нативний бекенд не підтримує додаткові обмеження.")
+
+    params = np.linspace(start, stop, int(steps))
+    budgets = np.full((len(params), len(instruments)), np.nan)
+    feasible = np.zeros(len(params), dtype=bool)
+    statuses = [STATUS_INFEASIBLE] * len(params)
+
+    if goal == GOAL_MAX_TOTAL_REACH:
+        previous, previous_param = None, None
+        for k, param in enumerate(params):
+            warm = None if previous is None or previous_param == 0 else previous * (param / previous_param)
+            point = solve_total_reach(instruments, param, total_audience, start=warm, weights=weights)
+            if point is not None:
+                budgets[k], feasible[k], statuses[k] = point, True, STATUS_OPTIMAL
+                previous, previous_param = point, param
+            report_progress((k + 1) / len(params))
+    elif backend == 'pulp' or extra_constraints:
+        model, budget_vars = build_model(instruments, goal, params[0], total_audience)
+        for constraint in extra_constraints:
+            constraint(model, budget_vars)
+        for k, param in enumerate(params):
+            set_rhs(model, instruments, goal, param, total_audience)
+            statuses[k], point = solve_model(model, budget_vars, warm_start=k > 0, time_limit=time_limit)
+            if point is not None:
+                budgets[k], feasible[k] = point, True
+            report_progress((k + 1) / len(params))
+    else:
+        # Спліт для одиничного параметра (бюджет 1 $ або ціль 1%) масштабується лінійно
+        unit = solve_native(instruments, goal, 1.0, total_audience)
+        if unit is not None:
+            scale = np.where(params >= 0, params, np.nan)
+            budgets = np.outer(scale, unit)
+            feasible = params >= 0
+            statuses = [STATUS_OPTIMAL if ok else STATUS_INFEASIBLE for ok in feasible]
+
+    spent = np.where(feasible, np.nansum(budgets, axis=1), np.nan)
+    rates = instruments.reach_per_dollar / total_audience
+    reach = np.where(feasible, combine_reach(np.nan_to_num(budgets) * rates, weights), np.nan)
+    linear_reach = np.where(feasible, np.nan_to_num(budgets) @ instruments.reach_per_dollar, np.nan)
+
+    curve = pd.DataFrame({
+        "Parameter": params,
+        "Status": statuses,
+        "TotalBudget": spent,
+        "TotalReachPct": reach,
+        "LinearReach": linear_reach,
+    })
+    split = pd.DataFrame(budgets, columns=instruments.names)
+    return pd.concat([curve, split], axis=1)
@@ -0,0 +1,163 @@
+"""Excel-звіти за результатами оптимізації.
+
+Книги пишуться в write-only режимі openpyxl: рядки потоково скидаються у
+тимчасові файли аркушів, тож пам'ять не росте з кількістю сценаріїв.
+"""
+
+import io
+import math
+import re
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.chart import BarChart, Reference, ScatterChart, Series
+from openpyxl.utils import get_column_letter
+
+from result_cache import ResultCache
+from timing import stage
+
+EXCEL_COLUMNS = ["Instrument", "CPM", "CPR", "Freq", "MinShare", "MaxShare", "Budget", "BudgetSharePct", "Impressions", "Unique Reach (People)", "ReachPct"]
+PERCENT_FORMAT = '0.00%'
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Готові звіти кешуються за ключем результату, щоб не перебудовувати їх на кожен rerun
+report_cache = ResultCache(maxsize=32)
+
+_INVALID_TITLE_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def _excel_value(value):
+    # NaN/inf не мають представлення в Excel - лишаємо клітинку порожньою
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def _percent_cell(ws, value):
+    cell = WriteOnlyCell(ws, value=_excel_value(value))
+    cell.number_format = PERCENT_FORMAT
+    return cell
+
+
+def sheet_title(name, used):
+    """Допустима й унікальна в межах книги назва аркуша (до 31 символу)."""
+    base = _INVALID_TITLE_CHARS.sub("_", str(name)).strip("'")[:31] or "Scenario"
+    title, k = base, 1
+    while title.lower() in used:
+        k += 1
+        suffix = f" ({k})"
+        title = base[:31 - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+def write_result_sheet(wb, title, result, chart=True):
+    """Аркуш спліту: таблиця інструментів, рядок TOTAL і гістограма часток бюджету."""
+    ws = wb.create_sheet(title)
+    table = result.table
+    share_col = EXCEL_COLUMNS.index("BudgetSharePct")
+
+    ws.append(EXCEL_COLUMNS)
+    # Рядки збираються з колонок-масивів, без побудови проміжного DataFrame
+    columns = [table[col].to_numpy() for col in EXCEL_COLUMNS]
+    for values in zip(*columns):
+        row = [_excel_value(v) for v in values]
+        row[share_col] = _percent_cell(ws, values[share_col])
+        ws.append(row)
+
+    # Рядок "TOTAL" з сумарними значеннями
+    total_row = [
+        "TOTAL", None, None, None,
+        table["MinShare"].sum(), # Сума MinShare
+        table["MaxShare"].sum(), # Сума MaxShare
+        result.total_budget,
+        1.0, # 100% для загальної частки бюджету
+        table["Impressions"].sum(),
+        result.linear_reach, # Сума унікального охоплення (людей)
+        f"{result.total_reach*100:.2f}%", # Загальне охоплення за нелінійною формулою
+    ]
+    ws.append([_excel_value(v) for v in total_row])
+
+    if chart:
+        bar_chart = BarChart()
+        bar_chart.type = "col"
+        bar_chart.title = "Бюджет по інструментам (%)"
+        bar_chart.y_axis.title = "Budget Share (%)"
+        bar_chart.x_axis.title = "Інструменти"
+        data = Reference(ws, min_col=share_col + 1, min_row=1, max_row=1+len(table)) # Дані для графіка (частка бюджету)
+        categories = Reference(ws, min_col=1, min_row=2, max_row=1+len(table)) # Категорії (назви інструментів)
+        bar_chart.add_data(data, titles_from_data=True)
+        bar_chart.set_categories(categories)
+        ws.add_chart(bar_chart, f"L{share_col + 1}")
+
+    # Закриття аркуша звільняє його тимчасовий файл одразу, а не під час збереження книги
+    ws.close()
+    return ws
+
+
+def write_frontier_sheet(wb, title, curve):
+    """Аркуш кривої бюджет–охоплення з точковим графіком."""
+    ws = wb.create_sheet(title)
+    reach_col = curve.columns.get_loc("TotalReachPct")
+    budget_col = curve.columns.get_loc("TotalBudget")
+
+    ws.append([str(col) for col in curve.columns])
+    for values in curve.itertuples(index=False, name=None):
+        row = [_excel_value(v) for v in values]
+        row[reach_col] = _percent_cell(ws, values[reach_col])
+        ws.append(row)
+
+    curve_chart = ScatterChart()
+    curve_chart.title = "Крива бюджет–охоплення"
+    curve_chart.style = 13
+    curve_chart.x_axis.title = "Бюджет ($)"
+    curve_chart.y_axis.title = "Фактичне охоплення (%)"
+    x_values = Reference(ws, min_col=budget_col + 1, min_row=2, max_row=1+len(curve))
+    y_values = Reference(ws, min_col=reach_col + 1, min_row=1, max_row=1+len(curve))
+    curve_chart.series.append(Series(y_values, x_values, title_from_data=True))
+    ws.add_chart(curve_chart, f"{get_column_letter(len(curve.columns) + 2)}2")
+
+    ws.close()
+    return ws
+
+
+def build_report(result, curve=None):
+    """Звіт для одного розрахунку (аркуш спліту + необов'язкова крива); повертає bytes."""
+    with stage("excel_build"):
+        wb = Workbook(write_only=True)
+        write_result_sheet(wb, "Гібридний спліт", result)
+        if curve is not None:
+            write_frontier_sheet(wb, "Крива бюджет-охоплення", curve)
+        output = io.BytesIO()
+        wb.save(output)
+    return output.getvalue()
+
+
+def cached_report(key, result, curve=None):
+    return report_cache.get_or_compute(key, lambda: build_report(result, curve))
+
+
+def write_scenarios_workbook(scenarios, fileobj, charts=False):
+    """Потоково пише книгу з аркушем на кожен сценарій і зведеним аркушем.
+
+    ``scenarios`` - ітерабельне (можна генератор) пар ``(назва, SolveResult)``;
+    в пам'яті одночасно тримається лише поточний сценарій. ``fileobj`` - шлях
+    або файловий об'єкт.
+    """
+    wb = Workbook(write_only=True)
+    summary = wb.create_sheet("Сценарії")
+    summary.append(["Scenario", "Sheet", "Status", "TotalBudget", "TotalReachPct", "LinearReach"])
+    used = {summary.title.lower()}
+
+    for name, result in scenarios:
+        title = sheet_title(name, used) if result.ok else None
+        summary.append([
+            str(name), title, result.status,
+            _excel_value(result.total_budget),
+            _percent_cell(summary, result.total_reach),
+            _excel_value(result.linear_reach),
+        ])
+        if result.ok:
+            write_result_sheet(wb, title, result, chart=charts)
+
+    wb.save(fileobj)
@@ -0,0 +1,228 @@
+"""Кеш результатів оптимізації, спільний для всіх сесій процесу.
+
+Ключ - стабільний хеш таблиці інструментів та параметрів мети. Результати
+зберігаються в пам'яті з LRU-витісненням і, за бажанням, у локальній теці,
+щоб переживати перезапуски сервера. Кількість файлів на диску обмежена:
+після кожного запису найдавніше використані (за mtime) видаляються.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from mip import BuyingUnits, solve_mip
+from optimizer import Instruments, frontier, normalize_goal, solve
+from robustness import run_robustness
+
+CACHE_SIZE_ENV = "SPLIT_OPTIMIZER_CACHE_SIZE"
+CACHE_DIR_ENV = "SPLIT_OPTIMIZER_CACHE_DIR"
+CACHE_DISK_SIZE_ENV = "SPLIT_OPTIMIZER_CACHE_DISK_SIZE"
+
+# Версія формату та алгоритмів, що входить у кожен ключ. Збільшується, коли змінюються
+# результати розв'язувачів або структура результатів, щоб збережені на диску записи
+# попередніх версій більше не віддавалися (вони витісняються як найдавніші)
+CACHE_VERSION = 2
+
+
+def cache_key(instruments, goal, *params, overlap=None, **options):
+    """Канонічний sha256-хеш версії кешу, інструментів, мети, числових параметрів і перетину аудиторій."""
+    instruments = Instruments.coerce(instruments)
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_VERSION}\x1f".encode())
+    digest.update(normalize_goal(goal).encode())
+    digest.update("\x1f".join(instruments.names).encode())
+    for column in (instruments.cpm, instruments.freq, instruments.min_share, instruments.max_share):
+        # "+ 0.0" перетворює -0.0 на 0.0, щоб вони давали однаковий ключ
+        digest.update(np.ascontiguousarray(column + 0.0, dtype='<f8').tobytes())
+        digest.update(b"|")
+    if overlap is not None:
+        digest.update(b"overlap")
+        digest.update(np.ascontiguousarray(np.asarray(overlap, dtype=float) + 0.0, dtype='<f8').tobytes())
+    digest.update(repr(tuple(float(p) + 0.0 for p in params)).encode())
+    digest.update(repr(sorted(options.items())).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """LRU-кеш з лічильниками влучань/промахів і необов'язковим сховищем на диску."""
+
+    def __init__(self, maxsize=256, directory=None, disk_maxsize=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.disk_maxsize = disk_maxsize or maxsize
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _remember(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        # Перевірка лише пам'яті, без зміни лічильників і порядку LRU
+        with self._lock:
+            return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+
+        if self.directory:
+            try:
+                with open(self._path(key), "rb") as fh:
+                    value = pickle.load(fh)
+                # mtime - час останнього використання, за ним витісняються файли
+                os.utime(self._path(key))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+            else:
+                with self._lock:
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        if self.directory:
+            # Запис через тимчасовий файл, щоб паралельні процеси не читали половину файлу
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Видаляє найдавніше використані файли понад ``disk_maxsize``."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    try:
+                        entries.append((entry.stat().st_mtime_ns, entry.path))
+                    except FileNotFoundError:
+                        pass
+        if len(entries) <= self.disk_maxsize:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.disk_maxsize]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Файл уже видалив інший процес
+                pass
+
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Очищує пам'ять, лічильники і файли кешу на диску."""
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = self.disk_hits = 0
+        if self.directory:
+            with os.scandir(self.directory) as it:
+                paths = [entry.path for entry in it if entry.name.endswith(".pkl")]
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+            }
+
+
+# Модульний екземпляр спільний для всіх сесій Streamlit у межах процесу
+default_cache = ResultCache(
+    maxsize=int(os.environ.get(CACHE_SIZE_ENV, 256)),
+    directory=os.environ.get(CACHE_DIR_ENV) or None,
+    disk_maxsize=int(os.environ.get(CACHE_DISK_SIZE_ENV, 1024)),
+)
+
+
+def cached_solve(instruments, goal, budget_or_target, total_audience, backend='auto', extra_constraints=(), overlap=None, time_limit=None, cache=None):
+    """solve() через кеш. Задачі з extra_constraints не кешуються: функції не хешуються.
+
+    Результат спільний для всіх сесій, тому його не можна змінювати на місці.
+    """
+    if extra_constraints:
+        return solve(instruments, goal, budget_or_target, total_audience, backend, extra_constraints, overlap, time_limit)
+    cache = default_cache if cache is None else cache
+    instruments = Instruments.coerce(instruments)
+    key = cache_key(instruments, goal, budget_or_target, total_audience, overlap=overlap, kind='solve', backend=backend, time_limit=time_limit)
+    return cache.get_or_compute(
+        key, lambda: solve(instruments, goal, budget_or_target, total_audience, backend, overlap=overlap, time_limit=time_limit),
+    )
+
+
+def cached_frontier(instruments, goal, start, stop, steps, total_audience, backend='auto', overlap=None, time_limit=None, cache=None):
+    cache = default_cache if cache is None else cache
+    instruments = Instruments.coerce(instruments)
+    key = cache_key(instruments, goal, start, stop, steps, total_audience, overlap=overlap, kind='frontier', backend=backend, time_limit=time_limit)
+    return cache.get_or_compute(
+        key, lambda: frontier(instruments, goal, start, stop, steps, total_audience, backend, overlap=overlap, time_limit=time_limit),
+    )
+
+
+def cached_robustness(instruments, goal, budget_or_target, total_audience, n, spread, seed=0, overlap=None, cache=None):
+    """run_robustness() через кеш; фіксований ``seed`` робить результат відтворюваним.
+
+    З ``seed=None`` кожен запуск дає нові сценарії, тому такий результат не кешується.
+    """
+    if seed is None:
+        return run_robustness(instruments, goal, budget_or_target, total_audience, n=n, spread=spread, seed=seed, overlap=overlap)
+    cache = default_cache if cache is None else cache
+    instruments = Instruments.coerce(instruments)
+    key = cache_key(instruments, goal, budget_or_target, total_audience, n, spread, overlap=overlap, kind='robustness', seed=seed)
+    return cache.get_or_compute(
+        key, lambda: run_robustness(instruments, goal, budget_or_target, total_audience, n=n, spread=spread, seed=seed, overlap=overlap),
+    )
+
+
+def cached_solve_mip(df, goal, budget_or_target, total_audience, options=None, overlap=None, cache=None):
+    """solve_mip() через кеш; ``df`` - таблиця інструментів з колонками одиниць закупівлі.
+
+    Плани, зупинені за лімітом часу, теж кешуються: повторний запуск з тими
+    самими параметрами дав би приблизно той самий план за ту саму затримку.
+    """
+    cache = default_cache if cache is None else cache
+    units = BuyingUnits.from_frame(df)
+    instruments = Instruments.coerce(df)
+    key = cache_key(instruments, goal, budget_or_target, total_audience, overlap=overlap, kind='mip', units=units.fingerprint(), options=options)
+    return cache.get_or_compute(
+        key, lambda: solve_mip(instruments, goal, budget_or_target, total_audience, units=units, options=options, overlap=overlap),
+    )
@@ -0,0 +1,219 @@
+"""Монте-Карло оцінка стійкості спліту до невизначеності CPM та Freq.
+
+CPM і Freq у таблиці - точкові оцінки, а на практиці вони відхиляються
+приблизно на ±20%. Тут генеруються N збурених таблиць, кожна розв'язується
+тією ж моделлю, а результати зводяться в розподіли часток бюджету й охоплення.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from optimizer import (
+    GOAL_MAX_TOTAL_REACH,
+    GOAL_MIN_BUDGET,
+    Instruments,
+    normalize_goal,
+    overlap_weights,
+    solve_native_batch,
+    solve_total_reach,
+    total_reach,
+)
+from timing import report_progress, stage
+
+QUANTILES = (0.05, 0.5, 0.95)
+# Розмір пакета сценаріїв: між пакетами оновлюється прогрес і перевіряється скасування
+CHUNK_SIZE = 1000
+# Нелінійна модель розв'язується по сценарію (~1 мс), тож пакети менші, щоб кожен воркер отримав кілька
+TOTAL_REACH_CHUNK_SIZE = 100
+# Межа розміру масивів одного пакета (сценарії x інструменти)
+CHUNK_VALUES = 1_000_000
+# Скільки значень бюджетів (сценарії x інструменти) зберігається в результаті для квантилів часток
+MAX_STORED_VALUES = 2_000_000
+
+
+@dataclass
+class RobustnessResult:
+    goal: str
+    budgets: np.ndarray        # перші сценарії (до MAX_STORED_VALUES значень) x інструменти, NaN для недопустимих
+    reach: np.ndarray          # фактичне охоплення кожного сценарію, NaN для недопустимих
+    feasible: np.ndarray
+    shares: pd.DataFrame       # розподіл часток бюджету по інструментах
+    summary: pd.DataFrame      # P5/P50/P95 охоплення та загального бюджету
+
+
+def sample_instruments(instruments, n, spread=0.2, seed=None):
+    """N збурених копій CPM і Freq: множники рівномірні в [1 - spread, 1 + spread].
+
+    ``seed`` - число, SeedSequence або None. Повертає пару масивів (cpm, freq)
+    форми (n, інструменти).
+    """
+    rng = np.random.default_rng(seed)
+    shape = (int(n), len(instruments))
+    cpm = instruments.cpm * rng.uniform(1 - spread, 1 + spread, shape)
+    freq = instruments.freq * rng.uniform(1 - spread, 1 + spread, shape)
+    return cpm, freq
+
+
+def solve_samples(cpm, freq, min_share, max_share, goal, budget_or_target, total_audience, weights=None):
+    """Розв'язує пакет збурених таблиць; повертає бюджети форми (сценарії, інструменти)."""
+    denom = cpm * freq
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reach_per_dollar = np.where(denom != 0, 1000 / denom, 0.0)
+
+    if goal != GOAL_MAX_TOTAL_REACH:
+        return solve_native_batch(reach_per_dollar, min_share, max_share, goal, budget_or_target, total_audience)
+
+    # Нелінійна модель ітеративна, тому розв'язується по сценарію
+    budgets = np.full(cpm.shape, np.nan)
+    names = np.empty(cpm.shape[1], dtype=object)
+    for k in range(len(cpm)):
+        scenario = Instruments(names=names, cpm=cpm[k], freq=freq[k], min_share=min_share, max_share=max_share)
+        point = solve_total_reach(scenario, budget_or_target, total_audience, weights=weights)
+        if point is not None:
+            budgets[k] = point
+    return budgets
+
+
+def _solve_chunk(args):
+    """Генерує і розв'язує один пакет сценаріїв.
+
+    Повертає лише зведення пакета: охоплення та загальний бюджет кожного
+    сценарію, суму часток допустимих сценаріїв і перші ``keep`` рядків бюджетів.
+    """
+    instruments, size, spread, seed, keep, goal, budget_or_target, total_audience, weights = args
+    cpm, freq = sample_instruments(instruments, size, spread, seed)
+    budgets = solve_samples(cpm, freq, instruments.min_share, instruments.max_share, goal, budget_or_target, total_audience, weights)
+    feasible = ~np.isnan(budgets).any(axis=1)
+    reach = np.full(len(budgets), np.nan)
+    reach[feasible] = total_reach(budgets[feasible], cpm[feasible], freq[feasible], total_audience, weights)
+    spent = budgets.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share_sum = (budgets[feasible] / spent[feasible, None]).sum(axis=0)
+    # Копія, щоб зріз не тримав у пам'яті весь пакет
+    return budgets[:keep].copy(), reach, spent, share_sum
+
+
+def _pool_context():
+    # Черга запускає розрахунки в потоках, а fork з багатопотокового процесу небезпечний
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _solve_in_pool(chunks, workers):
+    """Розв'язує пакети в пулі процесів, повертаючи результати в порядку пакетів.
+
+    Пакетів більше, ніж воркерів, тож прогрес оновлюється впродовж розрахунку.
+    Якщо report_progress перериває задачу (скасування), пакети з черги пулу
+    знімаються, і виклик повертається, не чекаючи на них.
+    """
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=_pool_context())
+    try:
+        futures = [pool.submit(_solve_chunk, chunk) for chunk in chunks]
+        for done, future in enumerate(futures, start=1):
+            yield future.result()
+            report_progress(done / len(chunks))
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+
+def run_robustness(instruments, goal, budget_or_target, total_audience, n=1000, spread=0.2,
+                   seed=None, workers=None, chunk_size=None, overlap=None):
+    """Генерує ``n`` сценаріїв і розв'язує їх пакетами по ``chunk_size``.
+
+    Сценарії кожного пакета генеруються окремо з дочірнього SeedSequence(seed),
+    тож у пам'яті одночасно лише пакет, а результат з тим самим ``seed`` не
+    залежить від ``workers``. У результаті зберігаються охоплення й бюджет
+    кожного сценарію та бюджети лише перших сценаріїв (MAX_STORED_VALUES);
+    середні частки рахуються за всіма сценаріями, квантилі часток - за
+    збереженими.
+
+    Лінійні моделі розв'язуються векторно в поточному процесі пакетами по
+    CHUNK_SIZE: пул процесів коштував би більше, ніж сам розв'язок. Нелінійна
+    модель ітеративна, тому її пакети (TOTAL_REACH_CHUNK_SIZE) розв'язуються в
+    ProcessPoolExecutor (forkserver або spawn, тож скрипт, що викликає
+    функцію, потребує ``if __name__ == "__main__"``). ``workers=None`` - усі ядра;
+    з ``workers=1`` пул не запускається. ``overlap`` - як у optimizer.solve().
+    Прогрес повідомляється після кожного пакета (timing.report_progress).
+    """
+    instruments = Instruments.coerce(instruments)
+    weights = overlap_weights(overlap, len(instruments))
+    goal = normalize_goal(goal)
+    if goal == GOAL_MIN_BUDGET and budget_or_target <= 0:
+        raise ValueError("Цільовий відсоток охоплення має бути більше 0%.")
+
+    n, m = int(n), len(instruments)
+    if chunk_size is None:
+        chunk_size = TOTAL_REACH_CHUNK_SIZE if goal == GOAL_MAX_TOTAL_REACH else CHUNK_SIZE
+    chunk_size = max(min(int(chunk_size), CHUNK_VALUES // max(m, 1)), 1)
+    sizes = [min(chunk_size, n - k) for k in range(0, n, chunk_size)]
+    stored = min(n, max(MAX_STORED_VALUES // max(m, 1), 1))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    chunks = [
+        (instruments, size, spread, chunk_seed, max(min(size, stored - k * chunk_size), 0),
+         goal, budget_or_target, total_audience, weights)
+        for k, (size, chunk_seed) in enumerate(zip(sizes, seeds))
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    with stage("robustness_solve"):
+        if goal == GOAL_MAX_TOTAL_REACH and workers > 1 and len(chunks) > 1:
+            parts = list(_solve_in_pool(chunks, workers))
+        else:
+            parts = []
+            for chunk in chunks:
+                parts.append(_solve_chunk(chunk))
+                report_progress(len(parts) / len(chunks))
+
+    with stage("robustness_summary"):
+        if not parts:
+            empty = np.empty(0)
+            return summarize(instruments, goal, np.empty((0, m)), empty, empty, np.zeros(m))
+        budgets, reach, spent, share_sum = (list(column) for column in zip(*parts))
+        return summarize(instruments, goal, np.concatenate(budgets), np.concatenate(reach), np.concatenate(spent), np.sum(share_sum, axis=0))
+
+
+def summarize(instruments, goal, budgets, reach, spent, share_sum):
+    """Зводить сценарії в квантилі часток бюджету та охоплення.
+
+    ``reach`` і ``spent`` - по всіх сценаріях (NaN охоплення - недопустимий
+    сценарій), ``share_sum`` - сума часток допустимих сценаріїв, ``budgets`` -
+    збережені перші сценарії для квантилів часток.
+    """
+    feasible = ~np.isnan(reach)
+    stored_feasible = ~np.isnan(budgets).any(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = budgets[stored_feasible] / budgets[stored_feasible].sum(axis=1, keepdims=True)
+
+    share_table = pd.DataFrame({"Instrument": instruments.names})
+    if feasible.any() and len(shares):
+        share_quantiles = np.quantile(shares, QUANTILES, axis=0)
+        share_table["ShareMean"] = share_sum / feasible.sum()
+        for q, values in zip(QUANTILES, share_quantiles):
+            share_table[f"ShareP{q*100:g}"] = values
+    else:
+        share_table["ShareMean"] = np.nan
+        for q in QUANTILES:
+            share_table[f"ShareP{q*100:g}"] = np.nan
+
+    summary = pd.DataFrame(
+        {
+            "TotalReachPct": np.quantile(reach[feasible], QUANTILES) if feasible.any() else np.nan,
+            "TotalBudget": np.quantile(spent[feasible], QUANTILES) if feasible.any() else np.nan,
+        },
+        index=[f"P{q*100:g}" for q in QUANTILES],
+    )
+    return RobustnessResult(
+        goal=goal,
+        budgets=budgets,
+        reach=reach,
+        feasible=feasible,
+        shares=share_table,
+        summary=summary,
+    )
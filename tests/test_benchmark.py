@@ -0,0 +1,16 @@
+import json
+
+import benchmark
+
+
+def test_benchmark_smoke(tmp_path):
+    path = tmp_path / "bench.json"
+    benchmark.main(["--sizes", "5", "--repeats", "1", "--mip-time-limit", "5", "--json", str(path)])
+    data = json.loads(path.read_text(encoding="utf-8"))
+    cases = {(row["case"], row["goal"], row["backend"]) for row in data["results"]}
+    assert ("excel_export", benchmark.GOAL_MAX_REACH, None) in cases
+    assert ("solve", benchmark.GOAL_MAX_TOTAL_REACH, "native") in cases
+    assert ("solve", benchmark.GOAL_MIN_BUDGET, "mip") in cases
+    for row in data["results"]:
+        assert row["instruments"] == 5
+        assert 0 <= row["p50_ms"] <= row["p99_ms"]
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from instrument_table import clean_table, default_shares, default_table, read_table
+from optimizer import GOAL_MAX_REACH, GOAL_MIN_BUDGET, solve
+
+
+def test_read_table_maps_aliases_and_decimal_commas():
+    data = (
+        "Назва;cpm;Частота;Min Share;max_share\n"
+        "Banner;50,5;1,2;0,01;0,3\n"
+        "Video;120;2;0;0,5\n"
+    ).encode("utf-8")
+    df = read_table(data, "plan.csv")
+    assert list(df.columns) == ["Instrument", "CPM", "Freq", "MinShare", "MaxShare"]
+    assert df["Instrument"].tolist() == ["Banner", "Video"]
+    assert df["CPM"].tolist() == [50.5, 120.0]
+    assert df["Freq"].tolist() == [1.2, 2.0]
+    assert df["MinShare"].tolist() == [0.01, 0.0]
+    assert df["MaxShare"].tolist() == [0.3, 0.5]
+
+
+def test_read_table_fills_missing_share_columns():
+    rows = "".join(f"I{k},{10 + k % 7},1.5\n" for k in range(300))
+    df = read_table(f"Instrument,CPM,Frequency\n{rows}".encode(), "plan.csv")
+    min_share, max_share = default_shares(300)
+    assert df["MinShare"].eq(min_share).all() and df["MaxShare"].eq(max_share).all()
+    assert df["MinShare"].sum() <= 1
+
+
+@pytest.mark.parametrize("data", [b"", b"Instrument,CPM,Freq\n"])
+def test_read_table_rejects_empty_table(data):
+    with pytest.raises(ValueError):
+        read_table(data, "plan.csv")
+
+
+@pytest.mark.parametrize("n", [1, 3, 25, 101, 5000])
+def test_default_table_is_feasible(n):
+    df = default_table(n)
+    assert solve(df, GOAL_MAX_REACH, 100000, 50000).ok
+    assert solve(df, GOAL_MIN_BUDGET, 30, 50000).ok
+
+
+def test_read_table_rejects_missing_columns():
+    with pytest.raises(ValueError, match="CPM"):
+        read_table(b"Instrument,Freq\nA,1.5\n", "plan.csv")
+
+
+def test_read_table_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        read_table(b"", "plan.json")
+
+
+def test_clean_table_fills_blank_cells_with_defaults():
+    df = pd.DataFrame({
+        "Instrument": ["A", None],
+        "CPM": ["10,5", None],
+        "Freq": [2.0, np.nan],
+        "MinShare": [np.nan, 0.05],
+        "MaxShare": [0.4, ""],
+    })
+    cleaned = clean_table(df)
+    assert cleaned["Instrument"].tolist() == ["A", "Instrument 2"]
+    assert cleaned["CPM"].tolist() == [10.5, 0.0]
+    min_share, max_share = default_shares(2)
+    assert cleaned["MinShare"].tolist() == [min_share, 0.05]
+    assert cleaned["MaxShare"].tolist() == [0.4, max_share]
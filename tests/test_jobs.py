@@ -0,0 +1,124 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from jobs import CANCELLED, DONE, JobCancelled, SolveQueue, job_result
+from timing import report_progress, stage
+
+
+def _wait_for(event):
+    def run():
+        while not event.wait(0.01):
+            report_progress(0.5)
+        return "ok"
+    return run
+
+
+@pytest.fixture
+def queue():
+    queue = SolveQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def test_same_key_is_shared(queue):
+    release = threading.Event()
+    first = queue.submit(_wait_for(release), key="k", subscriber="a")
+    second = queue.submit(_wait_for(release), key="k", subscriber="b")
+    assert first is second
+    assert first.subscribers == {"a", "b"}
+    release.set()
+    assert job_result(first) == "ok"
+
+
+def test_cancel_waits_for_last_subscriber(queue):
+    release = threading.Event()
+    job = queue.submit(_wait_for(release), key="k", subscriber="a")
+    queue.submit(_wait_for(release), key="k", subscriber="b")
+
+    assert not queue.cancel(job.id, subscriber="a")
+    assert not job.cancel_requested
+    assert queue.cancel(job.id, subscriber="b")
+    queue.wait([job], timeout=5)
+    assert job.state == CANCELLED
+    with pytest.raises(JobCancelled):
+        job_result(job)
+
+
+def test_cancel_one_subscriber_keeps_result(queue):
+    release = threading.Event()
+    job = queue.submit(_wait_for(release), key="k", subscriber="a")
+    queue.submit(_wait_for(release), key="k", subscriber="b")
+    queue.cancel(job.id, subscriber="a")
+    release.set()
+    queue.wait([job], timeout=5)
+    assert job.state == DONE
+    assert job_result(job) == "ok"
+
+
+def test_cancel_without_subscriber_stops_job(queue):
+    release = threading.Event()
+    job = queue.submit(_wait_for(release), key="k", subscriber="a")
+    assert queue.cancel(job.id)
+    queue.wait([job], timeout=5)
+    assert job.state == CANCELLED
+
+
+def test_cancelled_key_starts_new_job(queue):
+    release = threading.Event()
+    job = queue.submit(_wait_for(release), key="k", subscriber="a")
+    queue.cancel(job.id, subscriber="a")
+    fresh = queue.submit(_wait_for(release), key="k", subscriber="b")
+    assert fresh is not job
+    release.set()
+    assert job_result(fresh) == "ok"
+
+
+def test_job_stages_recorded_in_worker(queue):
+    def staged():
+        with stage("inner"):
+            return "ok"
+
+    job = queue.submit(staged)
+    assert job_result(job) == "ok"
+    assert set(job.timer.totals()) == {"inner"}
+
+
+def test_release_drops_job_after_last_subscriber(queue):
+    release = threading.Event()
+    job = queue.submit(_wait_for(release), key="k", subscriber="a")
+    queue.submit(_wait_for(release), key="k", subscriber="b")
+    release.set()
+    job_result(job)
+
+    queue.release(job.id, subscriber="a")
+    assert queue.poll(job.id) is job
+    queue.release(job.id, subscriber="b")
+    assert queue.poll(job.id) is None
+    # Після звільнення той самий ключ ставить нову задачу
+    assert queue.submit(_wait_for(release), key="k") is not job
+
+
+def test_history_bounds_uncollected_jobs():
+    queue = SolveQueue(workers=1, history=3)
+    try:
+        jobs = [queue.submit(lambda: "ok") for _ in range(10)]
+        queue.wait(jobs, timeout=5)
+        queue.submit(lambda: "ok")
+        assert sum(queue.poll(job.id) is not None for job in jobs) <= 3
+    finally:
+        queue.shutdown()
+
+
+def test_engine_does_not_import_queue():
+    code = "import optimizer, robustness, mip, sys; print('jobs' in sys.modules)"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                               cwd=Path(__file__).resolve().parent.parent)
+    assert completed.stdout.strip() == "False"
+
+
+def test_report_progress_outside_queue_is_noop():
+    report_progress(0.5)
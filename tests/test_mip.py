@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import AUDIENCE, synthetic_table, with_buying_units
+from mip import BuyingUnits, MipOptions, plan_is_feasible, round_plan, solve_mip
+from optimizer import GOAL_MAX_REACH, GOAL_MIN_BUDGET, STATUS_OPTIMAL, Instruments, solve_native
+
+GOALS = [(GOAL_MAX_REACH, 1_000_000), (GOAL_MIN_BUDGET, 30)]
+
+
+def package_table(n, seed):
+    rng = np.random.default_rng(seed)
+    df = synthetic_table(n, seed)
+    df["MinShare"] = np.where(rng.random(n) < 0.5, 0.0, 0.1 / n)
+    df["MaxShare"] = min(1.0, 5 / n)
+    df["PackageSize"] = rng.choice([0.0, 1000.0, 10000.0], n)
+    df["MinSpend"] = np.where(rng.random(n) < 0.3, rng.uniform(100, 2000, n), 0.0)
+    df["SetupCost"] = np.where(rng.random(n) < 0.3, rng.uniform(10, 500, n), 0.0)
+    return df
+
+
+def large_min_spend_table(seed, n=6):
+    """Малі таблиці, де мінімальне замовлення обов'язкового інструмента більше за LP-бюджет."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Instrument": [f"I{i}" for i in range(n)],
+        "CPM": rng.uniform(10, 90, n).round(1),
+        "Freq": rng.uniform(1, 3, n).round(2),
+        "MinShare": rng.choice([0.0, 0.05], n),
+        "MaxShare": rng.choice([0.3, 0.6, 1.0], n),
+        "PackageSize": rng.choice([0.0, 0.0, 1000.0], n),
+        "MinSpend": rng.choice([0.0, 0.0, 5000.0], n),
+        "SetupCost": rng.choice([0.0, 0.0, 100.0], n),
+    })
+
+
+@pytest.mark.parametrize("goal, value", GOALS)
+@pytest.mark.parametrize("n", [5, 50, 500])
+def test_rounded_start_is_feasible_for_benchmark_units(goal, value, n):
+    df = with_buying_units(synthetic_table(n))
+    instruments, units = Instruments.from_frame(df), BuyingUnits.from_frame(df)
+    lp = solve_native(instruments, goal, value, AUDIENCE)
+    start = round_plan(instruments, units, goal, value, lp)
+    assert plan_is_feasible(instruments, units, goal, value, AUDIENCE, start)
+
+
+@pytest.mark.parametrize("goal, value", GOALS)
+@pytest.mark.parametrize("seed", range(10))
+def test_rounded_start_is_feasible_for_mixed_units(goal, value, seed):
+    df = package_table(40, seed)
+    instruments, units = Instruments.from_frame(df), BuyingUnits.from_frame(df)
+    lp = solve_native(instruments, goal, value, AUDIENCE)
+    start = round_plan(instruments, units, goal, value, lp)
+    assert plan_is_feasible(instruments, units, goal, value, AUDIENCE, start)
+
+
+@pytest.mark.parametrize("goal, value", GOALS)
+def test_mip_plan_respects_buying_units(goal, value):
+    df = package_table(30, seed=1)
+    instruments, units = Instruments.from_frame(df), BuyingUnits.from_frame(df)
+    result = solve_mip(df, goal, value, AUDIENCE, options=MipOptions(time_limit=20))
+    assert result.ok
+    budgets = result.table["Budget"].to_numpy()
+    assert plan_is_feasible(instruments, units, goal, value, AUDIENCE, budgets, tol=1e-5)
+
+
+def test_mip_returns_plan_within_time_limit():
+    df = with_buying_units(synthetic_table(500))
+    result = solve_mip(df, GOAL_MIN_BUDGET, 30, AUDIENCE, options=MipOptions(time_limit=2))
+    assert result.ok
+
+
+def test_mip_without_units_matches_lp():
+    df = synthetic_table(30)
+    for goal, value in GOALS:
+        lp = solve_native(Instruments.from_frame(df), goal, value, AUDIENCE)
+        result = solve_mip(df, goal, value, AUDIENCE)
+        if goal == GOAL_MIN_BUDGET:
+            assert result.total_budget == pytest.approx(lp.sum(), rel=1e-6)
+        else:
+            assert result.linear_reach == pytest.approx(lp @ Instruments.from_frame(df).reach_per_dollar, rel=1e-6)
+
+
+def test_min_budget_with_large_min_spend_is_not_infeasible():
+    df = pd.DataFrame({
+        "Instrument": list("ABCDEF"),
+        "CPM": [57.3, 72.5, 85, 13.6, 50.1, 62.5],
+        "Freq": [1.12, 2.58, 2.43, 2.87, 1.74, 1.94],
+        "MinShare": [0.05, 0, 0.05, 0.05, 0, 0],
+        "MaxShare": [1, 0.3, 0.6, 0.3, 0.6, 1],
+        "PackageSize": [0, 0, 0, 0, 1000, 0],
+        "MinSpend": [0, 0, 5000, 0, 5000, 5000],
+        "SetupCost": [0, 100, 0, 0, 0, 100],
+    })
+    result = solve_mip(df, GOAL_MIN_BUDGET, 30, 50000)
+    assert result.status == STATUS_OPTIMAL
+    assert result.total_budget == pytest.approx(8333.33, rel=1e-5)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_min_budget_start_covers_large_min_spend(seed):
+    df = large_min_spend_table(seed)
+    instruments, units = Instruments.from_frame(df), BuyingUnits.from_frame(df)
+    lp = solve_native(instruments, GOAL_MIN_BUDGET, 30, 50000)
+    if lp is None:
+        pytest.skip("LP-модель недопустима")
+    start = round_plan(instruments, units, GOAL_MIN_BUDGET, 30, lp)
+    assert plan_is_feasible(instruments, units, GOAL_MIN_BUDGET, 30, 50000, start)
+
+    result = solve_mip(df, GOAL_MIN_BUDGET, 30, 50000)
+    reference = solve_mip(df, GOAL_MIN_BUDGET, 30, 50000, options=MipOptions(big_m=1e8))
+    assert result.status == reference.status == STATUS_OPTIMAL
+    assert result.total_budget == pytest.approx(reference.total_budget, rel=1e-6)
@@ -0,0 +1,143 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from optimizer import (
+    GOAL_MAX_REACH,
+    GOAL_MIN_BUDGET,
+    Instruments,
+    backends_agree,
+    combine_reach,
+    frontier,
+    greedy_fill,
+    solve,
+    solve_total_reach,
+)
+
+
+def random_instruments(rng, n):
+    return Instruments(
+        names=np.array([f"Instrument {i+1}" for i in range(n)]),
+        cpm=rng.uniform(5, 40, n),
+        freq=rng.uniform(0.8, 3, n),
+        min_share=rng.uniform(0, 0.1, n),
+        max_share=rng.uniform(0.2, 1, n),
+    )
+
+
+def best_vertex_reach(instruments, total_budget, total_audience):
+    """Повний перебір вершин: усі інструменти на межах, крім одного."""
+    rates = instruments.reach_per_dollar / total_audience
+    lower = np.maximum(instruments.min_share * total_budget, 0.0)
+    upper = np.maximum(lower, np.minimum(instruments.max_share * total_budget, 1 / rates))
+    best = -np.inf
+    for mask in itertools.product([False, True], repeat=len(rates)):
+        base = np.where(mask, upper, lower)
+        for j in range(len(rates)):
+            budgets = base.copy()
+            budgets[j] = np.clip(total_budget - (base.sum() - base[j]), lower[j], upper[j])
+            if budgets.sum() <= total_budget + 1e-9:
+                best = max(best, combine_reach(rates * budgets))
+    return best
+
+
+def test_total_reach_escapes_linear_vertex():
+    instruments = Instruments(
+        names=np.array(["A", "B"]),
+        cpm=np.array([15.066, 28.988]),
+        freq=np.array([1.3398, 0.8996]),
+        min_share=np.array([0.01233, 0.0366]),
+        max_share=np.array([0.52127, 0.81341]),
+    )
+    budgets = solve_total_reach(instruments, 1349.9, 50000)
+    assert budgets == pytest.approx([251.878, 1098.022], abs=1e-2)
+    assert combine_reach(instruments.reach_per_dollar / 50000 * budgets) == pytest.approx(0.8815, abs=1e-4)
+
+
+def test_total_reach_matches_vertex_enumeration():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        instruments = random_instruments(rng, int(rng.integers(2, 7)))
+        total_budget = rng.uniform(200, 5000)
+        budgets = solve_total_reach(instruments, total_budget, 50000)
+        if budgets is None:
+            continue
+        reach = combine_reach(instruments.reach_per_dollar / 50000 * budgets)
+        assert reach >= best_vertex_reach(instruments, total_budget, 50000) - 1e-9
+
+
+def test_total_reach_not_below_linear_split():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        instruments = random_instruments(rng, 20)
+        linear = solve(instruments, 'max_reach', 3000, 50000)
+        nonlinear = solve(instruments, 'max_total_reach', 3000, 50000)
+        assert linear.ok == nonlinear.ok
+        if linear.ok:
+            assert nonlinear.total_reach >= linear.total_reach - 1e-12
+
+
+@pytest.mark.parametrize("goal, value", [(GOAL_MAX_REACH, 3000), (GOAL_MIN_BUDGET, 30)])
+def test_backends_agree_random(goal, value):
+    rng = np.random.default_rng(2)
+    for _ in range(30):
+        instruments = random_instruments(rng, int(rng.integers(2, 30)))
+        assert backends_agree(instruments, goal, value, 50000)
+
+
+@pytest.mark.parametrize("goal, value", [(GOAL_MAX_REACH, 3000), (GOAL_MIN_BUDGET, 30)])
+@pytest.mark.parametrize("min_share, max_share", [
+    ([0.6, 0.6], [1.0, 1.0]),  # Сума нижніх меж більша за бюджет
+    ([0.0, 0.0], [0.3, 0.3]),  # Верхні межі не покривають бюджет
+    ([0.5, 0.0], [0.4, 1.0]),  # Нижня межа більша за верхню
+])
+def test_backends_agree_infeasible(goal, value, min_share, max_share):
+    instruments = Instruments(
+        names=np.array(["A", "B"]),
+        cpm=np.array([10.0, 20.0]),
+        freq=np.array([1.5, 2.0]),
+        min_share=np.array(min_share),
+        max_share=np.array(max_share),
+    )
+    native = solve(instruments, goal, value, 50000, backend='native')
+    if goal == GOAL_MIN_BUDGET or min_share[0] > max_share[0] or sum(min_share) > 1:
+        assert not native.ok
+    assert backends_agree(instruments, goal, value, 50000)
+
+
+def test_greedy_fill_is_optimal_knapsack():
+    rng = np.random.default_rng(3)
+    weights = rng.uniform(-1, 1, (100, 8))
+    lower = rng.uniform(0, 1, (100, 8))
+    upper = lower + rng.uniform(0, 2, (100, 8))
+    amount = rng.uniform(0, 10, 100)
+    filled = greedy_fill(weights, lower, upper, amount)
+
+    assert np.all(filled >= lower - 1e-12) and np.all(filled <= upper + 1e-12)
+    expected = np.minimum(amount, (upper - lower).sum(axis=1))
+    assert (filled - lower).sum(axis=1) == pytest.approx(expected)
+    # Нижчі за вагою інструменти дозаповнюються лише після насичення сильніших
+    for row in range(100):
+        order = np.argsort(-weights[row], kind='stable')
+        extra = (filled - lower)[row, order]
+        saturated = np.isclose(extra, (upper - lower)[row, order])
+        started = np.flatnonzero(extra > 1e-12)
+        if len(started):
+            assert saturated[:started[-1]].all()
+
+
+def test_greedy_fill_positive_only_skips_negative_weights():
+    filled = greedy_fill([1.0, -1.0, 0.0], [0.0, 0.5, 0.0], [1.0, 2.0, 5.0], 10.0, positive_only=True)
+    assert filled.tolist() == [1.0, 0.5, 0.0]
+
+
+@pytest.mark.parametrize("goal, start, stop", [(GOAL_MAX_REACH, 1000, 20000), (GOAL_MIN_BUDGET, 5, 60)])
+def test_native_frontier_matches_pointwise_solves(goal, start, stop):
+    instruments = random_instruments(np.random.default_rng(4), 12)
+    curve = frontier(instruments, goal, start, stop, 7, 50000, backend='native')
+    for _, row in curve.iterrows():
+        point = solve(instruments, goal, row["Parameter"], 50000, backend='pulp')
+        assert point.ok
+        assert row["TotalBudget"] == pytest.approx(point.total_budget, rel=1e-6)
+        assert row["LinearReach"] == pytest.approx(point.linear_reach, rel=1e-6)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import synthetic_table
+from optimizer import (
+    GOAL_MAX_REACH,
+    GOAL_MAX_TOTAL_REACH,
+    Instruments,
+    combine_reach,
+    frontier,
+    group_overlap_weights,
+    overlap_weights,
+    solve,
+    total_reach,
+)
+from robustness import run_robustness
+
+
+def test_identical_duplicated_channels_reach_like_one():
+    for k in (2, 3, 5):
+        weights = overlap_weights(np.ones((k, k)), k)
+        assert weights == pytest.approx(np.full(k, 1 / k))
+        assert combine_reach(np.full(k, 0.3), weights) == pytest.approx(0.3)
+
+
+def test_overlap_weights_inputs():
+    assert overlap_weights(None, 3) is None
+    assert overlap_weights(np.eye(3), 3) == pytest.approx(np.ones(3))
+    vector = np.array([1.0, 0.5, 0.25])
+    assert overlap_weights(vector, 3) == pytest.approx(vector)
+    # Значення поза [0, 1] обрізаються
+    assert overlap_weights(np.full((2, 2), 2.0), 2) == pytest.approx([0.5, 0.5])
+    with pytest.raises(ValueError):
+        overlap_weights(np.ones(2), 3)
+    with pytest.raises(ValueError):
+        overlap_weights(np.ones((2, 3)), 3)
+
+
+@pytest.mark.parametrize("duplication", [0.0, 0.4, 1.0, {"a": 0.3, "b": 0.8}])
+def test_group_weights_match_equivalent_matrix(duplication):
+    groups = ["a", "a", "b", None, "b", "b", np.nan, "a"]
+    n = len(groups)
+    rho = (
+        pd.Series(groups, dtype=object).map(duplication).fillna(0.0).to_numpy(dtype=float)
+        if isinstance(duplication, dict) else np.full(n, duplication)
+    )
+    matrix = np.eye(n)
+    for i in range(n):
+        for j in range(n):
+            if i != j and groups[i] is not None and groups[i] == groups[j]:
+                matrix[i, j] = rho[i]
+    assert group_overlap_weights(groups, duplication) == pytest.approx(overlap_weights(matrix, n))
+
+
+def test_batched_total_reach_matches_row_loop():
+    rng = np.random.default_rng(0)
+    budgets = rng.uniform(0, 5000, (50, 8))
+    cpm = rng.uniform(5, 50, (50, 8))
+    freq = rng.uniform(1, 3, (50, 8))
+    overlap = rng.uniform(0, 1, (8, 8))
+    batched = total_reach(budgets, cpm, freq, 100000, overlap)
+    looped = [total_reach(budgets[k], cpm[k], freq[k], 100000, overlap) for k in range(50)]
+    assert batched == pytest.approx(looped)
+
+
+def test_overlap_passed_through_solve_frontier_and_robustness():
+    df = synthetic_table(6)
+    instruments = Instruments.from_frame(df)
+    weights = group_overlap_weights(["a", "a", "a", "b", "b", None], 1.0)
+
+    independent = solve(df, GOAL_MAX_REACH, 100000, 5_000_000)
+    duplicated = solve(df, GOAL_MAX_REACH, 100000, 5_000_000, overlap=weights)
+    # Лінійний спліт не залежить від перетину, а фактичне охоплення падає
+    assert duplicated.total_budget == pytest.approx(independent.total_budget)
+    assert duplicated.total_reach < independent.total_reach
+    budgets = duplicated.table["Budget"].to_numpy()
+    assert duplicated.total_reach == pytest.approx(total_reach(budgets, instruments.cpm, instruments.freq, 5_000_000, weights))
+
+    nonlinear = solve(df, GOAL_MAX_TOTAL_REACH, 100000, 5_000_000, overlap=weights)
+    assert nonlinear.total_reach >= duplicated.total_reach - 1e-12
+
+    curve = frontier(df, GOAL_MAX_REACH, 100000, 100000, 1, 5_000_000, overlap=weights)
+    assert curve["TotalReachPct"].iloc[0] == pytest.approx(duplicated.total_reach)
+
+    robust = run_robustness(df, GOAL_MAX_REACH, 100000, 5_000_000, n=20, spread=0.0, seed=0, overlap=weights)
+    assert robust.reach == pytest.approx(np.full(20, duplicated.total_reach))
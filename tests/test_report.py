@@ -0,0 +1,74 @@
+import io
+import re
+
+import pytest
+from openpyxl import load_workbook
+
+from benchmark import synthetic_table
+from optimizer import GOAL_MAX_REACH, GOAL_MIN_BUDGET, SolveResult, frontier, solve
+from report import EXCEL_COLUMNS, PERCENT_FORMAT, build_report, sheet_title, write_scenarios_workbook
+
+AUDIENCE = 5_000_000
+
+
+def test_build_report_round_trip():
+    df = synthetic_table(8)
+    result = solve(df, GOAL_MAX_REACH, 100000, AUDIENCE)
+    curve = frontier(df, GOAL_MAX_REACH, 10000, 200000, 5, AUDIENCE)
+    wb = load_workbook(io.BytesIO(build_report(result, curve)))
+    assert wb.sheetnames == ["Гібридний спліт", "Крива бюджет-охоплення"]
+
+    ws = wb["Гібридний спліт"]
+    rows = list(ws.iter_rows(values_only=True))
+    assert list(rows[0]) == EXCEL_COLUMNS
+    assert len(rows) == 1 + len(df) + 1
+    assert [row[0] for row in rows[1:-1]] == df["Instrument"].tolist()
+    total = rows[-1]
+    assert total[0] == "TOTAL"
+    assert total[EXCEL_COLUMNS.index("Budget")] == pytest.approx(result.total_budget)
+    assert total[-1] == f"{result.total_reach*100:.2f}%"
+    share_col = EXCEL_COLUMNS.index("BudgetSharePct") + 1
+    assert all(ws.cell(row=r, column=share_col).number_format == PERCENT_FORMAT for r in range(2, len(df) + 2))
+    assert len(ws._charts) == 1
+
+    curve_ws = wb["Крива бюджет-охоплення"]
+    curve_rows = list(curve_ws.iter_rows(values_only=True))
+    assert list(curve_rows[0]) == [str(col) for col in curve.columns]
+    assert len(curve_rows) == 1 + len(curve)
+    reach_col = curve.columns.get_loc("TotalReachPct") + 1
+    assert curve_ws.cell(row=2, column=reach_col).number_format == PERCENT_FORMAT
+    assert len(curve_ws._charts) == 1
+
+
+def test_sheet_title_is_unique_and_valid():
+    used = {"сценарії"}
+    names = ["Сценарії", "a/b:c*?[d]", "x" * 40, "x" * 40, "x" * 40, "'quoted'", ""]
+    titles = [sheet_title(name, used) for name in names]
+    assert len({title.lower() for title in titles}) == len(titles)
+    for title in titles:
+        assert 0 < len(title) <= 31
+        assert not re.search(r"[\[\]:*?/\\]", title)
+        assert not title.startswith("'")
+    assert titles[0].lower() != "сценарії"
+
+
+def test_scenarios_workbook_consumes_generator_and_skips_failed():
+    df = synthetic_table(5)
+    consumed = []
+
+    def scenarios():
+        for k, budget in enumerate([50000, 100000, 150000]):
+            consumed.append(k)
+            yield f"Budget {budget}", solve(df, GOAL_MAX_REACH, budget, AUDIENCE)
+        consumed.append("failed")
+        yield "Infeasible", SolveResult(goal=GOAL_MIN_BUDGET, status="Infeasible")
+
+    output = io.BytesIO()
+    write_scenarios_workbook(scenarios(), output)
+    assert consumed == [0, 1, 2, "failed"]
+
+    wb = load_workbook(output)
+    assert wb.sheetnames == ["Сценарії", "Budget 50000", "Budget 100000", "Budget 150000"]
+    summary = list(wb["Сценарії"].iter_rows(values_only=True))
+    assert len(summary) == 1 + 4
+    assert summary[-1][:3] == ("Infeasible", None, "Infeasible")
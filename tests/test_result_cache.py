@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import result_cache
+from optimizer import GOAL_MAX_REACH, GOAL_MIN_BUDGET, Instruments
+from result_cache import ResultCache, cache_key, cached_robustness
+
+
+def make_frame():
+    return pd.DataFrame({
+        "Instrument": ["A", "B", "C"],
+        "CPM": [10.0, 20.5, 7.25],
+        "Freq": [1.5, 2.0, 3.0],
+        "MinShare": [0.0, 0.1, 0.05],
+        "MaxShare": [0.5, 0.6, 0.7],
+    })
+
+
+def test_cache_key_is_stable_across_inputs():
+    df = make_frame()
+    key = cache_key(df, GOAL_MAX_REACH, 1000, 50000, kind='solve', backend='auto')
+    assert key == cache_key(Instruments.from_frame(df), 'max_reach', 1000.0, 50000, backend='auto', kind='solve')
+    assert key == cache_key(df.to_dict("list"), GOAL_MAX_REACH, np.float64(1000), 50000, kind='solve', backend='auto')
+
+
+def test_cache_key_treats_negative_zero_as_zero():
+    df = make_frame()
+    negative = df.assign(MinShare=[-0.0, 0.1, 0.05])
+    assert cache_key(df, GOAL_MAX_REACH, 1000, 50000) == cache_key(negative, GOAL_MAX_REACH, 1000, 50000)
+    assert cache_key(df, GOAL_MAX_REACH, 0.0, 50000) == cache_key(df, GOAL_MAX_REACH, -0.0, 50000)
+
+
+def test_cache_key_distinguishes_inputs():
+    df = make_frame()
+    key = cache_key(df, GOAL_MAX_REACH, 1000, 50000)
+    assert key != cache_key(df, GOAL_MIN_BUDGET, 1000, 50000)
+    assert key != cache_key(df, GOAL_MAX_REACH, 1001, 50000)
+    assert key != cache_key(df.assign(CPM=[10.0, 20.5, 7.5]), GOAL_MAX_REACH, 1000, 50000)
+    assert key != cache_key(df.assign(Instrument=["A", "B", "D"]), GOAL_MAX_REACH, 1000, 50000)
+    assert key != cache_key(df, GOAL_MAX_REACH, 1000, 50000, overlap=[1.0, 1.0, 0.5])
+    assert key != cache_key(df, GOAL_MAX_REACH, 1000, 50000, kind='frontier')
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(maxsize=2, directory=str(tmp_path), disk_maxsize=3)
+    for k in range(3):
+        cache.put(f"key{k}", k)
+        os.utime(cache._path(f"key{k}"), (k, k))
+    # Читання з диска оновлює mtime, тож key0 стає найсвіжішим
+    assert ResultCache(directory=str(tmp_path)).get("key0") == 0
+    cache.put("key3", 3)
+
+    assert sorted(os.listdir(tmp_path)) == ["key0.pkl", "key2.pkl", "key3.pkl"]
+
+
+def test_robustness_without_seed_is_not_cached():
+    cache = ResultCache()
+    cached_robustness(make_frame(), GOAL_MAX_REACH, 1000, 50000, 10, 0.2, seed=None, cache=cache)
+    assert cache.stats()["size"] == 0
+    cached_robustness(make_frame(), GOAL_MAX_REACH, 1000, 50000, 10, 0.2, seed=1, cache=cache)
+    assert cache.stats()["size"] == 1
+
+
+def test_cache_key_includes_version(monkeypatch):
+    key = cache_key(make_frame(), GOAL_MAX_REACH, 1000, 50000)
+    monkeypatch.setattr(result_cache, "CACHE_VERSION", result_cache.CACHE_VERSION + 1)
+    assert cache_key(make_frame(), GOAL_MAX_REACH, 1000, 50000) != key
+
+
+def test_clear_removes_disk_entries(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    cache.put("key", 1)
+    cache.clear()
+    assert os.listdir(tmp_path) == []
+    assert ResultCache(directory=str(tmp_path)).get("key") is None
@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+import pytest
+
+import robustness
+from benchmark import synthetic_table
+from jobs import CANCELLED, SolveQueue
+from optimizer import GOAL_MAX_REACH, GOAL_MAX_TOTAL_REACH, GOAL_MIN_BUDGET
+from robustness import run_robustness
+
+
+@pytest.mark.parametrize("goal, value", [(GOAL_MAX_REACH, 100000), (GOAL_MIN_BUDGET, 30)])
+def test_linear_goals_stay_in_process(monkeypatch, goal, value):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("лінійні моделі не мають запускати пул процесів")
+
+    monkeypatch.setattr(robustness, "ProcessPoolExecutor", no_pool)
+    result = run_robustness(synthetic_table(20), goal, value, 5_000_000, n=2500, seed=0, workers=4)
+    assert result.budgets.shape == (2500, 20)
+    assert result.feasible.all()
+
+
+def test_total_reach_pool_matches_single_process():
+    df = synthetic_table(10)
+    single = run_robustness(df, GOAL_MAX_TOTAL_REACH, 100000, 5_000_000, n=40, seed=0, workers=1)
+    pooled = run_robustness(df, GOAL_MAX_TOTAL_REACH, 100000, 5_000_000, n=40, seed=0, workers=2)
+    np.testing.assert_allclose(pooled.budgets, single.budgets)
+
+
+def test_stored_budgets_are_bounded(monkeypatch):
+    monkeypatch.setattr(robustness, "MAX_STORED_VALUES", 20 * 300)
+    result = run_robustness(synthetic_table(20), GOAL_MAX_REACH, 100000, 5_000_000, n=2500, seed=0, chunk_size=1000)
+    assert result.budgets.shape == (300, 20)
+    assert result.reach.shape == result.feasible.shape == (2500,)
+    # Середні частки - за всіма сценаріями, а не лише за збереженими
+    full = run_robustness(synthetic_table(20), GOAL_MAX_REACH, 100000, 5_000_000, n=2500, seed=0, chunk_size=1000)
+    np.testing.assert_allclose(result.shares["ShareMean"], full.shares["ShareMean"])
+
+
+def test_chunk_layout_does_not_depend_on_workers():
+    df = synthetic_table(10)
+    first = run_robustness(df, GOAL_MAX_REACH, 100000, 5_000_000, n=3000, seed=7, workers=1)
+    second = run_robustness(df, GOAL_MAX_REACH, 100000, 5_000_000, n=3000, seed=7, workers=4)
+    np.testing.assert_array_equal(first.reach, second.reach)
+
+
+def test_pool_cancel_does_not_wait_for_remaining_chunks():
+    queue = SolveQueue(workers=1)
+    try:
+        job = queue.submit(run_robustness, synthetic_table(50), GOAL_MAX_TOTAL_REACH, 100000, 5_000_000,
+                           n=20000, seed=0, workers=2)
+        while job.progress == 0 and not job.done:
+            time.sleep(0.05)
+        queue.cancel(job.id)
+        started = time.perf_counter()
+        queue.wait([job], timeout=30)
+        assert job.state == CANCELLED
+        assert time.perf_counter() - started < 5
+    finally:
+        queue.shutdown()
@@ -0,0 +1,61 @@
+import json
+import threading
+
+from timing import StageTimer, stage
+
+
+def test_stages_recorded_only_with_active_timer():
+    with stage("outside"):
+        pass
+    with StageTimer() as timer:
+        with stage("solve"):
+            pass
+    with stage("after"):
+        pass
+    assert [name for name, _ in timer.stages] == ["solve"]
+
+
+def test_nested_and_repeated_stages():
+    with StageTimer() as timer:
+        with stage("outer"):
+            with stage("inner"):
+                pass
+            with stage("inner"):
+                pass
+    assert [name for name, _ in timer.stages] == ["inner", "inner", "outer"]
+    totals = timer.totals()
+    assert totals["outer"] >= totals["inner"] >= 0
+    assert timer.elapsed >= totals["outer"]
+
+
+def test_nested_timers_restore_outer():
+    with StageTimer() as outer:
+        with StageTimer() as inner:
+            with stage("a"):
+                pass
+        with stage("b"):
+            pass
+    assert list(inner.totals()) == ["a"]
+    assert list(outer.totals()) == ["b"]
+
+
+def test_timer_is_isolated_per_thread():
+    def work():
+        with stage("thread"):
+            pass
+
+    with StageTimer() as timer:
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert timer.stages == []
+
+
+def test_to_json():
+    with StageTimer() as timer:
+        timer.record("solve", 0.0125)
+        timer.record("solve", 0.0025)
+    data = json.loads(timer.to_json(instruments=5))
+    assert data["instruments"] == 5
+    assert data["stages_ms"] == {"solve": 15.0}
+    assert data["total_ms"] >= 0
@@ -0,0 +1,113 @@
+"""Поетапні заміри часу та прогрес для оптимізатора, звітів та інтерфейсу.
+
+Движок позначає етапи через ``stage("назва")``. Заміри записуються лише тоді,
+коли в поточному контексті активний StageTimer (``with StageTimer() as timer``),
+тож без нього хуки майже нічого не коштують.
+
+Довгі розрахунки так само повідомляють прогрес через ``report_progress(частка)``;
+обробник встановлює викликач (наприклад, фонова черга jobs) через
+``progress_callback``, тож движок не залежить від черги.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger("split_optimizer.perf")
+
+_active_timer = ContextVar("active_timer", default=None)
+_progress_callback = ContextVar("progress_callback", default=None)
+
+
+class StageTimer:
+    """Збирає тривалості етапів (у секундах) у порядку їх завершення."""
+
+    def __init__(self):
+        self.stages = []
+        self.started = time.perf_counter()
+        self.finished = None
+        self._token = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Робить таймер активним у поточному контексті (для коду без with-блоку)."""
+        self.started = time.perf_counter()
+        self.finished = None
+        self._token = _active_timer.set(self)
+        return self
+
+    def stop(self):
+        self.finished = time.perf_counter()
+        if self._token is not None:
+            _active_timer.reset(self._token)
+            self._token = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def record(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    def totals(self):
+        """Сумарний час по кожній назві етапу (етап може повторюватися)."""
+        totals = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def to_dict(self, **context):
+        return {
+            **context,
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.totals().items()},
+            # Етапи можуть бути вкладеними, тому загальний час - це час роботи таймера, а не сума
+            "total_ms": round(self.elapsed * 1000, 3),
+        }
+
+    def to_json(self, **context):
+        return json.dumps(self.to_dict(**context), ensure_ascii=False)
+
+    def log(self, **context):
+        logger.info(self.to_json(**context))
+
+
+@contextmanager
+def stage(name):
+    """Замірює блок коду, якщо в контексті є активний StageTimer."""
+    timer = _active_timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.record(name, time.perf_counter() - started)
+
+
+def report_progress(fraction):
+    """Передає прогрес (0..1) обробнику з поточного контексту.
+
+    Без обробника нічого не робить. Обробник може перервати розрахунок
+    винятком (так фонова черга скасовує задачі).
+    """
+    callback = _progress_callback.get()
+    if callback is not None:
+        callback(fraction)
+
+
+@contextmanager
+def progress_callback(callback):
+    """Встановлює обробник report_progress на час блоку в поточному контексті."""
+    token = _progress_callback.set(callback)
+    try:
+        yield
+    finally:
+        _progress_callback.reset(token)